@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Web 资源后处理脚本
+为 dist/ 中面向 Web 的资源生成预压缩与新格式副本
+
+- 文本资源（SVG / manifest.json / browserconfig.xml / HTML 片段 / 预览索引）
+  生成 .gz 副本，安装了 brotli 模块时同时生成 .br 副本
+- PWA 与社交媒体 PNG 生成 WebP 副本，Pillow 支持时同时生成 AVIF 副本
+
+静态托管可直接返回预压缩文件，无需在请求时消耗 CPU 压缩。
+副本仅在比原文件更小时才会保留；generate_icons.py / generate_manifest.py
+改写某个文件时会用 remove_variants() 删除它的旧副本，避免返回过期内容。
+"""
+
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from reproducible import source_date_epoch
+
+
+# 需要预压缩的文本资源（相对 dist/）
+TEXT_ASSETS = [
+    "svg/*.svg",
+    "pwa/manifest.json",
+    "pwa/browserconfig.xml",
+    "*/*.html",
+    "preview-index.json",
+]
+
+# 需要生成新格式副本的图片（相对 dist/）
+IMAGE_ASSETS = [
+    "pwa/*.png",
+    "social/*.png",
+]
+
+DEFAULT_OPTIONS = {
+    "gzip_level": 9,
+    "brotli_quality": 11,
+    "webp_lossless": True,
+    "webp_quality": 90,
+    "avif_quality": 80,
+}
+
+
+def load_config(project_root):
+    """加载配置"""
+    config_path = os.path.join(project_root, "config.json")
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def variant_paths(path):
+    """本脚本可能为 path 生成的全部副本路径"""
+    paths = [path + ".gz", path + ".br"]
+    stem, ext = os.path.splitext(path)
+    if ext.lower() == ".png":
+        paths += [stem + ".webp", stem + ".avif"]
+    return paths
+
+
+def remove_variants(path):
+    """删除 path 的全部副本（原文件即将被改写时调用）"""
+    for variant in variant_paths(path):
+        try:
+            os.remove(variant)
+        except OSError:
+            pass
+
+
+def avif_supported():
+    """当前 Pillow 是否可写 AVIF"""
+    from PIL import Image
+
+    Image.init()
+    return "AVIF" in Image.SAVE
+
+
+def _collect(dist_dir, patterns):
+    """按模式收集文件，去重并排序"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(os.path.join(dist_dir, pattern)))
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def _write_variant(path, variant_path, data, original_size, report, dist_dir):
+    """写入副本（仅在更小时保留），并记录到报告"""
+    rel = os.path.relpath(path, dist_dir).replace(os.sep, "/")
+    variant_rel = os.path.relpath(variant_path, dist_dir).replace(os.sep, "/")
+    if len(data) >= original_size:
+        if os.path.exists(variant_path):
+            os.remove(variant_path)
+        print(f"  ⏭️  {variant_rel} 未变小，已跳过")
+        return
+    with open(variant_path, "wb") as f:
+        f.write(data)
+    epoch = source_date_epoch()
+    if epoch is not None:
+        os.utime(variant_path, (epoch, epoch))
+    saved = original_size - len(data)
+    report.append({
+        "asset": rel,
+        "variant": variant_rel,
+        "original_bytes": original_size,
+        "variant_bytes": len(data),
+        "saved_bytes": saved,
+    })
+    print(f"  ✅ {variant_rel}  {original_size} → {len(data)} B "
+          f"(-{saved * 100 // original_size}%)")
+
+
+def compress_text_assets(dist_dir, options, report):
+    """生成 .gz / .br 预压缩副本"""
+    print("\n🗜️  文本资源预压缩")
+    if brotli is None:
+        print("  💡 未安装 brotli 模块，仅生成 .gz（pip install brotli）")
+
+    for path in _collect(dist_dir, TEXT_ASSETS):
+        with open(path, "rb") as f:
+            data = f.read()
+        # mtime=0 保证相同输入得到相同输出
+        gz = gzip.compress(data, compresslevel=options["gzip_level"], mtime=0)
+        _write_variant(path, path + ".gz", gz, len(data), report, dist_dir)
+        if brotli is not None:
+            br = brotli.compress(data, quality=options["brotli_quality"])
+            _write_variant(path, path + ".br", br, len(data), report, dist_dir)
+
+
+def encode_image_variants(dist_dir, options, report):
+    """生成 WebP / AVIF 副本"""
+    from PIL import Image
+
+    print("\n🖼️  新格式图片副本")
+    use_avif = avif_supported()
+    if not use_avif:
+        print("  💡 当前 Pillow 不支持 AVIF，仅生成 WebP")
+
+    for path in _collect(dist_dir, IMAGE_ASSETS):
+        stem = os.path.splitext(path)[0]
+        original_size = os.path.getsize(path)
+        with Image.open(path) as img:
+            img = img.convert("RGBA")
+
+        buf = io.BytesIO()
+        if options["webp_lossless"]:
+            img.save(buf, "WEBP", lossless=True, quality=100, method=6)
+        else:
+            img.save(buf, "WEBP", quality=options["webp_quality"], method=6)
+        _write_variant(path, stem + ".webp", buf.getvalue(), original_size, report, dist_dir)
+
+        if use_avif:
+            buf = io.BytesIO()
+            img.save(buf, "AVIF", quality=options["avif_quality"])
+            _write_variant(path, stem + ".avif", buf.getvalue(), original_size, report, dist_dir)
+
+
+def main():
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="为 Web 资源生成预压缩与新格式副本")
+    parser.add_argument("--dist", default=os.path.join(project_root, "dist"),
+                        help="输出目录（默认 dist/）")
+    parser.add_argument("--report", help="将节省字节报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("❌ 缺少 Pillow 库，请运行: pip install Pillow")
+        sys.exit(1)
+
+    if not os.path.isdir(args.dist):
+        print(f"❌ 未找到输出目录: {args.dist}")
+        print("请先运行: python scripts/generate_icons.py")
+        sys.exit(1)
+
+    options = dict(DEFAULT_OPTIONS)
+    options.update(load_config(project_root).get("post_encode", {}))
+
+    print("📦 Web 资源后处理")
+    print("=" * 50)
+
+    report = []
+    compress_text_assets(args.dist, options, report)
+    encode_image_variants(args.dist, options, report)
+
+    total_original = sum(r["original_bytes"] for r in report)
+    total_saved = sum(r["saved_bytes"] for r in report)
+    print()
+    print("=" * 50)
+    print(f"📊 共生成 {len(report)} 个副本，节省 {total_saved} B"
+          + (f"（{total_saved * 100 // total_original}%）" if total_original else ""))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"assets": report, "saved_bytes": total_saved},
+                      f, indent=2, ensure_ascii=False)
+        print(f"📄 报告已写入: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,15 +17,25 @@
 
 import json
 import os
-import shutil
-import struct
 import sys
+import time
 
-try:
-    from PIL import Image, ImageDraw
-except ImportError:
-    print("❌ 缺少 Pillow 库，请运行: pip install Pillow")
-    sys.exit(1)
+# Pillow、cairosvg、SVG 优化等较重的依赖都在用到时才导入，
+# 以便只读取 ICON_SIZES / plan_targets 的调用方与 --only 这类小任务快速启动
+
+
+def _require_pillow():
+    """检查 Pillow 是否可用"""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("❌ 缺少 Pillow 库，请运行: pip install Pillow")
+        sys.exit(1)
+
+
+from output_sink import OutputSink
+from raster_cache import (DEDUPE_OPTIONS, RasterCache, perceptual_hash, pixel_fingerprint,
+                          tool_version)
 
 
 # ============================================================
@@ -35,6 +45,18 @@ except ImportError:
 # 各平台所需尺寸
 ICON_SIZES = {
     "windows": [16, 24, 32, 48, 64, 128, 256],
+    "macos": {
+        "icon_16x16": 16,
+        "icon_16x16@2x": 32,
+        "icon_32x32": 32,
+        "icon_32x32@2x": 64,
+        "icon_128x128": 128,
+        "icon_128x128@2x": 256,
+        "icon_256x256": 256,
+        "icon_256x256@2x": 512,
+        "icon_512x512": 512,
+        "icon_512x512@2x": 1024,
+    },
     "favicon": [16, 32, 48],
     "apple_touch": [120, 152, 167, 180],
     "android": {
@@ -60,13 +82,19 @@ ICON_SIZES = {
 }
 
 
+# 命令行覆盖的配置项（如 --source），监听模式重新加载配置时同样生效
+_config_overrides = {}
+
+
 def load_config(project_root):
     """加载配置"""
+    config = {}
     config_path = os.path.join(project_root, "config.json")
     if os.path.exists(config_path):
         with open(config_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+            config = json.load(f)
+    config.update(_config_overrides)
+    return config
 
 
 def ensure_dir(path):
@@ -74,10 +102,187 @@ def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
 
+# 当前构建的输出通道；未设置时（例如作为模块调用）同步写入
+_output_sink = None
+
+
+def _sink():
+    global _output_sink
+    if _output_sink is None:
+        _output_sink = OutputSink(writers=0)
+    return _output_sink
+
+
+# 记录本次写出的文件 {绝对路径: 字节}，用于保存输出集合；None 表示不记录
+_recorded = None
+
+
+def write_bytes(path, data):
+    from compress_assets import remove_variants
+
+    if _recorded is not None:
+        _recorded[path] = data
+    # 部分构建与监听模式不清空 dist/，旧的 .gz / .br / .webp / .avif 副本会与新文件不一致
+    remove_variants(path)
+    _sink().write(path, data)
+
+
+def write_text(path, text):
+    write_bytes(path, text.encode("utf-8"))
+
+
+# --sizes 指定的尺寸集合；None 表示不过滤
+_size_filter = None
+
+
+def wanted_size(size):
+    """是否生成该尺寸：方形输出按边长匹配，非方形（社交图）按宽度匹配"""
+    if _size_filter is None:
+        return True
+    width = size[0] if isinstance(size, tuple) else size
+    return width in _size_filter
+
+
+# 缩放结果缓存：同一源图重复请求相同尺寸时直接复用（监听模式下跨轮次保持）
+_resize_cache = {"source": None, "fingerprint": None, "images": {}, "resampler": None}
+
+# 持久化栅格缓存；未设置时每次都重新缩放与编码
+_raster_cache = None
+
+# 缩放引擎：pillow 逐尺寸调用 thumbnail；numpy 在首次未命中时为源图建立一个
+# resample.BatchResampler，之后每个未命中的尺寸共用同一份预乘 float 源图（见 configure_resample）
+RESAMPLE_ENGINES = ("pillow", "numpy")
+_resample = {"engine": "pillow"}
+
+# 缩放滤镜标识，参与栅格缓存键（两种引擎的结果不逐字节相同；numpy 引擎还包含运行环境）
+RESAMPLE_FILTER = "lanczos-thumbnail"
+
+
+def configure_resample(config):
+    """按 config.json 的 resample 段选择缩放引擎；numpy 不可用时回退为 pillow"""
+    global RESAMPLE_FILTER
+    engine = config.get("resample", {}).get("engine", "pillow")
+    if engine not in RESAMPLE_ENGINES:
+        raise ValueError(f"resample.engine 必须是 {'/'.join(RESAMPLE_ENGINES)} 之一: {engine}")
+    if engine == "numpy":
+        try:
+            import resample
+        except ImportError:
+            print("⚠️  未安装 numpy，缩放回退为 Pillow 逐尺寸调用（pip install numpy）")
+            engine = "pillow"
+        else:
+            RESAMPLE_FILTER = resample.filter_id()
+    if engine == "pillow":
+        RESAMPLE_FILTER = "lanczos-thumbnail"
+    _resample["engine"] = engine
+
+
+def _source_entry(source_img):
+    if _resize_cache["source"] is not source_img:
+        _resize_cache["source"] = source_img
+        _resize_cache["fingerprint"] = None
+        _resize_cache["images"] = {}
+        _resize_cache["resampler"] = None
+    return _resize_cache
+
+
+def source_fingerprint(source_img):
+    """源图解码后像素的指纹（每个源图只计算一次）"""
+    entry = _source_entry(source_img)
+    if entry["fingerprint"] is None:
+        entry["fingerprint"] = pixel_fingerprint(source_img)
+    return entry["fingerprint"]
+
+
+def _write_cached(source_img, path, variant, encode):
+    """
+    写入由源图派生的编码结果
+    按 (像素指纹, 变体, 滤镜, 工具版本) 持久化缓存，命中时跳过 encode() 中的缩放与编码
+    """
+    if _raster_cache is None:
+        write_bytes(path, encode())
+        return
+    key = RasterCache.key(source_fingerprint(source_img), variant,
+                          RESAMPLE_FILTER, tool_version())
+    data = _raster_cache.get(key)
+    if data is None:
+        data = encode()
+        _raster_cache.put(key, data)
+    write_bytes(path, data)
+
+
+def save_derived(source_img, path, variant, render):
+    """
+    保存由源图派生的 PNG
+    variant 描述派生方式（参与缓存键），render() 返回图像，仅在缓存未命中时调用
+    """
+    _write_cached(source_img, path, ("PNG",) + tuple(variant),
+                  lambda: _sink().encode(render(), "PNG"))
+
+
+def save_resized(source_img, size, path):
+    """缩放并保存为 PNG"""
+    save_derived(source_img, path, ("resize", size),
+                 lambda: resize_icon(source_img, size))
+
+
+def save_ico(source_img, path, sizes):
+    """
+    保存多尺寸 ICO（ICO 格式最大 256）
+    --sizes 只决定是否重新生成：选中其中任一尺寸时仍写入包含全部尺寸的 ICO，
+    避免部分构建用残缺的 ICO 覆盖已有文件；返回写入的尺寸数（0 表示跳过）
+    """
+    ico_sizes = sorted(s for s in sizes if s <= 256)
+    if not any(wanted_size(s) for s in ico_sizes):
+        return 0
+
+    def encode():
+        # Pillow 会丢弃大于基础图像的尺寸，必须以最大的图像为基础
+        images = [resize_icon(source_img, s) for s in ico_sizes]
+        return _sink().encode(images[-1], "ICO", sizes=[(s, s) for s in ico_sizes],
+                              append_images=images[:-1])
+
+    _write_cached(source_img, path, ("ICO",) + tuple(ico_sizes), encode)
+    return len(ico_sizes)
+
+
 def resize_icon(source_img, size, keep_aspect=True):
     """
     高质量缩放图标
+    结果按 (尺寸, keep_aspect) 缓存，调用方不应原地修改返回的图像
     """
+    entry = _source_entry(source_img)
+    key = (size, keep_aspect)
+    img = entry["images"].get(key)
+    if img is None and keep_aspect and _batch_supported(source_img, size):
+        _resize_batch(entry, source_img, size)
+        img = entry["images"][key]
+    if img is None:
+        img = _resize_uncached(source_img, size, keep_aspect)
+        entry["images"][key] = img
+    return img
+
+
+def _batch_supported(source_img, size):
+    return (_resample["engine"] == "numpy" and not isinstance(size, tuple)
+            and source_img.width == source_img.height and size <= source_img.width)
+
+
+def _resize_batch(entry, source_img, size):
+    """
+    用共享的预乘 float 源图缩放 size
+    只在栅格缓存未命中时调用，缓存命中的尺寸不会被计算
+    """
+    from resample import BatchResampler
+
+    if entry.get("resampler") is None:
+        entry["resampler"] = BatchResampler(source_img)
+    entry["images"][(size, True)] = entry["resampler"].resize(size)
+
+
+def _resize_uncached(source_img, size, keep_aspect):
+    from PIL import Image
+
     if isinstance(size, tuple):
         target_w, target_h = size
     else:
@@ -108,24 +313,18 @@ def generate_windows_ico(source_img, output_dir):
     ensure_dir(output_dir)
 
     sizes = ICON_SIZES["windows"]
-    icon_images = []
 
     for size in sizes:
-        img = resize_icon(source_img, size)
-        icon_images.append(img)
+        if not wanted_size(size):
+            continue
         # 也保存单独的 PNG
-        img.save(os.path.join(output_dir, f"icon-{size}x{size}.png"), "PNG")
+        save_resized(source_img, size, os.path.join(output_dir, f"icon-{size}x{size}.png"))
         print(f"  ✅ icon-{size}x{size}.png")
 
     # 保存 ICO（多尺寸合并）
-    ico_path = os.path.join(output_dir, "icon.ico")
-    icon_images[0].save(
-        ico_path,
-        format="ICO",
-        sizes=[(s, s) for s in sizes if s <= 256],
-        append_images=icon_images[1:]
-    )
-    print(f"  ✅ icon.ico (含 {len([s for s in sizes if s <= 256])} 个尺寸)")
+    count = save_ico(source_img, os.path.join(output_dir, "icon.ico"), sizes)
+    if count:
+        print(f"  ✅ icon.ico (含 {count} 个尺寸)")
 
 
 # ============================================================
@@ -137,25 +336,13 @@ def generate_macos_icons(source_img, output_dir):
     print("\n🍎 macOS Icons")
     ensure_dir(output_dir)
 
-    macos_sizes = {
-        "icon_16x16": 16,
-        "icon_16x16@2x": 32,
-        "icon_32x32": 32,
-        "icon_32x32@2x": 64,
-        "icon_128x128": 128,
-        "icon_128x128@2x": 256,
-        "icon_256x256": 256,
-        "icon_256x256@2x": 512,
-        "icon_512x512": 512,
-        "icon_512x512@2x": 1024,
-    }
-
     iconset_dir = os.path.join(output_dir, "AppIcon.iconset")
     ensure_dir(iconset_dir)
 
-    for name, size in macos_sizes.items():
-        img = resize_icon(source_img, size)
-        img.save(os.path.join(iconset_dir, f"{name}.png"), "PNG")
+    for name, size in ICON_SIZES["macos"].items():
+        if not wanted_size(size):
+            continue
+        save_resized(source_img, size, os.path.join(iconset_dir, f"{name}.png"))
         print(f"  ✅ {name}.png ({size}x{size})")
 
     print(f"  📁 AppIcon.iconset/ 已创建")
@@ -174,20 +361,14 @@ def generate_favicon(source_img, output_dir):
     sizes = ICON_SIZES["favicon"]
 
     for size in sizes:
-        img = resize_icon(source_img, size)
-        img.save(os.path.join(output_dir, f"favicon-{size}x{size}.png"), "PNG")
+        if not wanted_size(size):
+            continue
+        save_resized(source_img, size, os.path.join(output_dir, f"favicon-{size}x{size}.png"))
         print(f"  ✅ favicon-{size}x{size}.png")
 
     # ICO 格式的 favicon
-    images_for_ico = [resize_icon(source_img, s) for s in sizes]
-    ico_path = os.path.join(output_dir, "favicon.ico")
-    images_for_ico[0].save(
-        ico_path,
-        format="ICO",
-        sizes=[(s, s) for s in sizes],
-        append_images=images_for_ico[1:]
-    )
-    print(f"  ✅ favicon.ico")
+    if save_ico(source_img, os.path.join(output_dir, "favicon.ico"), sizes):
+        print(f"  ✅ favicon.ico")
 
     # 生成 HTML 引用代码
     html_snippet = """<!-- Favicon 引用代码 -->
@@ -195,8 +376,7 @@ def generate_favicon(source_img, output_dir):
 <link rel="icon" type="image/png" sizes="32x32" href="/favicon-32x32.png">
 <link rel="icon" type="image/png" sizes="16x16" href="/favicon-16x16.png">
 """
-    with open(os.path.join(output_dir, "favicon-usage.html"), "w", encoding="utf-8") as f:
-        f.write(html_snippet)
+    write_text(os.path.join(output_dir, "favicon-usage.html"), html_snippet)
     print(f"  📄 favicon-usage.html（引用代码）")
 
 
@@ -212,14 +392,15 @@ def generate_apple_touch(source_img, output_dir):
     sizes = ICON_SIZES["apple_touch"]
 
     for size in sizes:
-        img = resize_icon(source_img, size)
-        img.save(os.path.join(output_dir, f"apple-touch-icon-{size}x{size}.png"), "PNG")
+        if not wanted_size(size):
+            continue
+        save_resized(source_img, size, os.path.join(output_dir, f"apple-touch-icon-{size}x{size}.png"))
         print(f"  ✅ apple-touch-icon-{size}x{size}.png")
 
     # 默认尺寸 180x180
-    img_180 = resize_icon(source_img, 180)
-    img_180.save(os.path.join(output_dir, "apple-touch-icon.png"), "PNG")
-    print(f"  ✅ apple-touch-icon.png (默认 180x180)")
+    if wanted_size(180):
+        save_resized(source_img, 180, os.path.join(output_dir, "apple-touch-icon.png"))
+        print(f"  ✅ apple-touch-icon.png (默认 180x180)")
 
     # HTML snippet
     html_snippet = """<!-- Apple Touch Icon 引用代码 -->
@@ -229,8 +410,7 @@ def generate_apple_touch(source_img, output_dir):
 <link rel="apple-touch-icon" sizes="167x167" href="/apple-touch-icon-167x167.png">
 <link rel="apple-touch-icon" sizes="180x180" href="/apple-touch-icon-180x180.png">
 """
-    with open(os.path.join(output_dir, "apple-touch-usage.html"), "w", encoding="utf-8") as f:
-        f.write(html_snippet)
+    write_text(os.path.join(output_dir, "apple-touch-usage.html"), html_snippet)
     print(f"  📄 apple-touch-usage.html（引用代码）")
 
 
@@ -244,26 +424,37 @@ def generate_android(source_img, output_dir):
     ensure_dir(output_dir)
 
     for dpi, size in ICON_SIZES["android"].items():
+        if not wanted_size(size):
+            continue
         dpi_dir = os.path.join(output_dir, f"mipmap-{dpi}")
         ensure_dir(dpi_dir)
-        img = resize_icon(source_img, size)
-        img.save(os.path.join(dpi_dir, "ic_launcher.png"), "PNG")
+        save_resized(source_img, size, os.path.join(dpi_dir, "ic_launcher.png"))
         print(f"  ✅ mipmap-{dpi}/ic_launcher.png ({size}x{size})")
 
     # 圆形图标（Android 自适应图标）
     for dpi, size in ICON_SIZES["android"].items():
+        if not wanted_size(size):
+            continue
         dpi_dir = os.path.join(output_dir, f"mipmap-{dpi}")
-        img = resize_icon(source_img, size)
-        # 创建圆形蒙版
-        mask = Image.new("L", (size, size), 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0, size - 1, size - 1), fill=255)
-        img_round = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-        img_round.paste(img, mask=mask)
-        img_round.save(os.path.join(dpi_dir, "ic_launcher_round.png"), "PNG")
+        save_derived(source_img, os.path.join(dpi_dir, "ic_launcher_round.png"),
+                     ("round", size), lambda size=size: _round_icon(source_img, size))
         print(f"  ✅ mipmap-{dpi}/ic_launcher_round.png ({size}x{size})")
 
 
+def _round_icon(source_img, size):
+    """圆形蒙版裁切"""
+    from PIL import Image, ImageDraw
+
+    img = resize_icon(source_img, size)
+    # 创建圆形蒙版
+    mask = Image.new("L", (size, size), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0, size - 1, size - 1), fill=255)
+    img_round = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    img_round.paste(img, mask=mask)
+    return img_round
+
+
 # ============================================================
 # PWA Icons
 # ============================================================
@@ -277,15 +468,17 @@ def generate_pwa(source_img, output_dir, config):
     icons_manifest = []
 
     for size in sizes:
-        img = resize_icon(source_img, size)
         filename = f"icon-{size}x{size}.png"
-        img.save(os.path.join(output_dir, filename), "PNG")
+        # manifest 始终列出全部尺寸，--sizes 只影响本次写出的 PNG
         icons_manifest.append({
             "src": f"/icons/{filename}",
             "sizes": f"{size}x{size}",
             "type": "image/png",
             "purpose": "any maskable"
         })
+        if not wanted_size(size):
+            continue
+        save_resized(source_img, size, os.path.join(output_dir, filename))
         print(f"  ✅ {filename}")
 
     # 生成 manifest.json
@@ -304,8 +497,7 @@ def generate_pwa(source_img, output_dir, config):
     }
 
     manifest_path = os.path.join(output_dir, "manifest.json")
-    with open(manifest_path, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    write_text(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False))
     print(f"  📄 manifest.json")
 
 
@@ -321,37 +513,54 @@ def generate_png_sizes(source_img, output_dir):
     sizes = ICON_SIZES["png_standard"]
 
     for size in sizes:
-        img = resize_icon(source_img, size)
-        img.save(os.path.join(output_dir, f"icon-{size}x{size}.png"), "PNG")
+        if not wanted_size(size):
+            continue
+        save_resized(source_img, size, os.path.join(output_dir, f"icon-{size}x{size}.png"))
         print(f"  ✅ icon-{size}x{size}.png")
 
 
 # ============================================================
-# SVG 复制
+# SVG 优化输出
 # ============================================================
 
-def generate_svg(project_root, output_dir):
-    """复制 SVG 源文件到输出目录"""
+def generate_svg(project_root, output_dir, config):
+    """优化 SVG 源文件并输出（svg_optimize.enabled 为 false 时原样复制）"""
+    from optimize_svg import optimize_svg_file
+
     print("\n✏️  SVG 矢量图标")
     ensure_dir(output_dir)
 
+    options = config.get("svg_optimize", {})
+    sources = []
+
     src_svg = os.path.join(project_root, "src", "icon.svg")
     if os.path.exists(src_svg):
-        shutil.copy2(src_svg, os.path.join(output_dir, "icon.svg"))
-        print(f"  ✅ icon.svg")
+        sources.append((src_svg, "icon.svg"))
     else:
         print(f"  ⚠️  未找到 src/icon.svg")
 
-    # 复制模板
+    # 模板
     templates_dir = os.path.join(project_root, "templates")
     if os.path.exists(templates_dir):
-        for f in os.listdir(templates_dir):
+        for f in sorted(os.listdir(templates_dir)):
             if f.endswith(".svg"):
-                shutil.copy2(
-                    os.path.join(templates_dir, f),
-                    os.path.join(output_dir, f)
-                )
-                print(f"  ✅ {f}")
+                sources.append((os.path.join(templates_dir, f), f))
+
+    total_before = total_after = 0
+    for src, name in sources:
+        dest = os.path.join(output_dir, name)
+        if options.get("enabled", True):
+            before, after = optimize_svg_file(src, dest, options, write=write_bytes)
+            total_before += before
+            total_after += after
+        else:
+            with open(src, "rb") as f:
+                write_bytes(dest, f.read())
+            print(f"  ✅ {name}")
+
+    if total_before:
+        print(f"  📊 SVG 共节省 {total_before - total_after} B "
+              f"({(total_before - total_after) * 100 // total_before}%)")
 
 
 # ============================================================
@@ -366,33 +575,27 @@ def generate_electron(source_img, output_dir):
     # Windows
     win_dir = os.path.join(output_dir, "win")
     ensure_dir(win_dir)
-    win_sizes = ICON_SIZES["electron"]["windows"]
-    win_images = [resize_icon(source_img, s) for s in win_sizes]
-    ico_path = os.path.join(win_dir, "icon.ico")
-    win_images[0].save(
-        ico_path, format="ICO",
-        sizes=[(s, s) for s in win_sizes if s <= 256],
-        append_images=win_images[1:]
-    )
-    print(f"  ✅ win/icon.ico")
+    if save_ico(source_img, os.path.join(win_dir, "icon.ico"), ICON_SIZES["electron"]["windows"]):
+        print(f"  ✅ win/icon.ico")
 
     # macOS - 保存 1024x1024 PNG（electron-builder 会自动转 icns）
     mac_dir = os.path.join(output_dir, "mac")
     ensure_dir(mac_dir)
-    img_1024 = resize_icon(source_img, 1024)
-    img_1024.save(os.path.join(mac_dir, "icon.png"), "PNG")
-    print(f"  ✅ mac/icon.png (1024x1024)")
+    if wanted_size(1024):
+        save_resized(source_img, 1024, os.path.join(mac_dir, "icon.png"))
+        print(f"  ✅ mac/icon.png (1024x1024)")
 
     # Linux
     linux_dir = os.path.join(output_dir, "linux")
     ensure_dir(linux_dir)
-    for size in ICON_SIZES["electron"]["linux"]:
-        img = resize_icon(source_img, size)
-        img.save(os.path.join(linux_dir, f"icon-{size}x{size}.png"), "PNG")
+    linux_sizes = [s for s in ICON_SIZES["electron"]["linux"] if wanted_size(s)]
+    for size in linux_sizes:
+        save_resized(source_img, size, os.path.join(linux_dir, f"icon-{size}x{size}.png"))
     # 默认图标
-    img_512 = resize_icon(source_img, 512)
-    img_512.save(os.path.join(linux_dir, "icon.png"), "PNG")
-    print(f"  ✅ linux/ ({len(ICON_SIZES['electron']['linux'])} 个尺寸)")
+    if wanted_size(512):
+        save_resized(source_img, 512, os.path.join(linux_dir, "icon.png"))
+    if linux_sizes:
+        print(f"  ✅ linux/ ({len(linux_sizes)} 个尺寸)")
 
 
 # ============================================================
@@ -414,29 +617,378 @@ def generate_social(source_img, output_dir, config):
         r, g, b = 255, 255, 255
 
     for name, (width, height) in ICON_SIZES["social"].items():
-        canvas = Image.new("RGBA", (width, height), (r, g, b, 255))
+        if not wanted_size((width, height)):
+            continue
+        save_derived(source_img, os.path.join(output_dir, f"{name}.png"),
+                     ("social", width, height, (r, g, b)),
+                     lambda width=width, height=height:
+                         _social_card(source_img, width, height, (r, g, b)))
+        print(f"  ✅ {name}.png ({width}x{height})")
 
-        # 将图标居中放置
-        icon_size = min(width, height) - 100
-        icon = resize_icon(source_img, icon_size)
 
-        offset_x = (width - icon.width) // 2
-        offset_y = (height - icon.height) // 2
-        canvas.paste(icon, (offset_x, offset_y), icon)
+def _social_card(source_img, width, height, bg):
+    """纯色背景上居中放置图标"""
+    from PIL import Image
 
-        canvas.save(os.path.join(output_dir, f"{name}.png"), "PNG")
-        print(f"  ✅ {name}.png ({width}x{height})")
+    canvas = Image.new("RGBA", (width, height), bg + (255,))
+
+    # 将图标居中放置
+    icon_size = min(width, height) - 100
+    icon = resize_icon(source_img, icon_size)
+
+    offset_x = (width - icon.width) // 2
+    offset_y = (height - icon.height) // 2
+    canvas.paste(icon, (offset_x, offset_y), icon)
+    return canvas
 
 
 # ============================================================
-# 主流程
+# 预览索引 & 精灵图
 # ============================================================
 
-def main():
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config = load_config(project_root)
+# preview.html 各分区对应的 dist 子目录
+PREVIEW_SECTIONS = {
+    "windows": "windows",
+    "macos": "macos/AppIcon.iconset",
+    "favicon": "favicon",
+    "apple": "apple-touch",
+    "android": "android",
+    "pwa": "pwa",
+    "png": "png",
+    "electron": "electron",
+    "social": "social",
+}
+
+# 预览页中图标的最大显示尺寸，精灵图按此尺寸缩放打包
+PREVIEW_DISPLAY_MAX = 128
+# 单张精灵图的最大边长，超出后另起一张
+PREVIEW_ATLAS_MAX = 1024
+
+
+def _pack_atlases(items):
+    """
+    货架式打包：按高度降序逐行排列，超出 PREVIEW_ATLAS_MAX 时另起一张
+    返回 [(atlas_w, atlas_h, [(item, x, y), ...]), ...]
+    """
+    atlases = []
+    placed, x, y, shelf_h, used_w = [], 0, 0, 0, 0
+    for item in sorted(items, key=lambda i: (-i["display"], i["path"])):
+        d = item["display"]
+        if x + d > PREVIEW_ATLAS_MAX:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        if y + d > PREVIEW_ATLAS_MAX:
+            atlases.append((used_w, y + shelf_h, placed))
+            placed, x, y, shelf_h, used_w = [], 0, 0, 0, 0
+        placed.append((item, x, y))
+        x += d
+        shelf_h = max(shelf_h, d)
+        used_w = max(used_w, x)
+    if placed:
+        atlases.append((used_w, y + shelf_h, placed))
+    return atlases
+
+
+def generate_preview_index(dist_dir):
+    """
+    生成 preview-index.json 与小图标精灵图
+    preview.html 只需加载一个索引和少量精灵图，而不是逐个请求 PNG
+    """
+    import hashlib
+    import io
+
+    from PIL import Image
+
+    print("\n👀 预览索引")
+    preview_dir = os.path.join(dist_dir, "preview")
+    ensure_dir(preview_dir)
+
+    sections = {}
+    tiles = {}
+    for key, subdir in PREVIEW_SECTIONS.items():
+        section_dir = os.path.join(dist_dir, subdir)
+        if not os.path.isdir(section_dir):
+            continue
+        files = []
+        for root, dirs, names in os.walk(section_dir):
+            dirs.sort()
+            for name in names:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    data = f.read()
+                with Image.open(io.BytesIO(data)) as img:
+                    width, height = img.size
+                entry = {
+                    "name": os.path.relpath(path, section_dir).replace(os.sep, "/"),
+                    "width": width,
+                    "height": height,
+                    "bytes": len(data),
+                }
+                files.append(entry)
+                # 社交图为宽幅大图，单独加载
+                if key != "social" and width == height:
+                    # 同一 PNG 常出现在多个分区（png / favicon / windows ...），只占一个图块
+                    display = min(width, PREVIEW_DISPLAY_MAX)
+                    tile_key = (hashlib.sha256(data).hexdigest(), display)
+                    tile = tiles.setdefault(tile_key, {
+                        "entries": [], "path": path, "display": display, "hash": tile_key[0]})
+                    tile["entries"].append(entry)
+        files.sort(key=lambda e: (e["width"] * e["height"], e["name"]))
+        sections[key] = {
+            "basePath": subdir,
+            "files": files,
+        }
+
+    # 上次生成的精灵图摘要，内容未变时跳过重新编码
+    index_path = os.path.join(dist_dir, "preview-index.json")
+    previous = {}
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                previous = {a["file"]: a.get("digest") for a in json.load(f).get("atlases", [])}
+        except (ValueError, KeyError, TypeError):
+            previous = {}
+
+    atlases = []
+    for index, (atlas_w, atlas_h, placed) in enumerate(_pack_atlases(tiles.values())):
+        filename = f"atlas-{index}.png"
+        atlas_path = os.path.join(preview_dir, filename)
+        digest = hashlib.sha1(f"{atlas_w}x{atlas_h}".encode())
+        for item, x, y in placed:
+            for entry in item["entries"]:
+                entry["sprite"] = {"atlas": index, "x": x, "y": y, "size": item["display"]}
+            digest.update(f"|{x},{y},{item['display']},{item['hash']}|".encode())
+        digest = digest.hexdigest()
+
+        cache_key = RasterCache.key("atlas", digest, tool_version())
+        cached = _raster_cache.get(cache_key) if _raster_cache is not None else None
+        if previous.get(f"preview/{filename}") == digest and os.path.exists(atlas_path):
+            atlas_bytes = os.path.getsize(atlas_path)
+            print(f"  ⏭️  preview/{filename} 未变化")
+        elif cached is not None:
+            write_bytes(atlas_path, cached)
+            atlas_bytes = len(cached)
+            print(f"  ✅ preview/{filename} ({atlas_w}x{atlas_h}, {len(placed)} 个图块，缓存)")
+        else:
+            atlas = Image.new("RGBA", (atlas_w, atlas_h), (0, 0, 0, 0))
+            for item, x, y in placed:
+                d = item["display"]
+                with Image.open(item["path"]) as img:
+                    tile = img.convert("RGBA")
+                if tile.size != (d, d):
+                    tile = tile.resize((d, d), Image.LANCZOS)
+                atlas.paste(tile, (x, y))
+            data = _sink().encode(atlas, "PNG", optimize=True)
+            write_bytes(atlas_path, data)
+            atlas_bytes = len(data)
+            if _raster_cache is not None:
+                _raster_cache.put(cache_key, data)
+            print(f"  ✅ preview/{filename} ({atlas_w}x{atlas_h}, {len(placed)} 个图块)")
+        atlases.append({
+            "file": f"preview/{filename}",
+            "width": atlas_w,
+            "height": atlas_h,
+            "bytes": atlas_bytes,
+            "digest": digest,
+        })
+
+    index = {
+        "version": 1,
+        "atlases": atlases,
+        "sections": sections,
+    }
+    write_text(index_path, json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+    total = sum(len(s["files"]) for s in sections.values())
+    print(f"  📄 preview-index.json ({total} 个图标)")
+
+
+# ============================================================
+# 生成目标
+# ============================================================
+
+# 格式开关 → 输出子目录、生成函数及其依赖的输入
+#   source: 源 PNG；svg: src/icon.svg 与 templates/*.svg；
+#   config: 影响输出的 config.json 顶层键；dist: 其它目标的输出
+TARGETS = {
+    "windows_ico": {"dir": "windows", "generator": generate_windows_ico, "inputs": ("source",),
+                    "sizes": ICON_SIZES["windows"]},
+    "macos_icns": {"dir": "macos", "generator": generate_macos_icons, "inputs": ("source",),
+                   "sizes": list(ICON_SIZES["macos"].values())},
+    "favicon": {"dir": "favicon", "generator": generate_favicon, "inputs": ("source",),
+                "sizes": ICON_SIZES["favicon"]},
+    "apple_touch": {"dir": "apple-touch", "generator": generate_apple_touch, "inputs": ("source",),
+                    "sizes": ICON_SIZES["apple_touch"] + [180]},
+    "android": {"dir": "android", "generator": generate_android, "inputs": ("source",),
+                "sizes": list(ICON_SIZES["android"].values())},
+    "pwa": {"dir": "pwa", "generator": generate_pwa, "inputs": ("source",),
+            "config": ("app_name", "theme_color", "background_color"),
+            "sizes": ICON_SIZES["pwa"]},
+    "png_sizes": {"dir": "png", "generator": generate_png_sizes, "inputs": ("source",),
+                  "sizes": ICON_SIZES["png_standard"]},
+    "svg": {"dir": "svg", "generator": generate_svg, "inputs": ("svg",),
+            "config": ("svg_optimize",)},
+    "electron": {"dir": "electron", "generator": generate_electron, "inputs": ("source",),
+                 "sizes": ICON_SIZES["electron"]["windows"] + ICON_SIZES["electron"]["linux"]
+                 + [512, 1024]},
+    "social": {"dir": "social", "generator": generate_social, "inputs": ("source",),
+               "config": ("background_color",),
+               "sizes": [min(w, h) - 100 for w, h in ICON_SIZES["social"].values()]},
+    "preview": {"dir": "preview", "generator": generate_preview_index, "inputs": ("dist",)},
+}
+
+
+def target_aliases():
+    """目标名与输出子目录名都可用于 --only（如 windows_ico / windows）"""
+    aliases = {key: key for key in TARGETS}
+    for key, spec in TARGETS.items():
+        aliases.setdefault(spec["dir"], key)
+    return aliases
+
+
+def plan_targets(config, only=None):
+    """
+    返回需要生成的目标（保持 TARGETS 顺序）
+    only 为空时按配置中的格式开关；指定时只生成列出的目标，不受格式开关影响
+    """
+    if only:
+        # 预览索引等依赖 dist 的目标若已启用，随选中的栅格目标一起刷新，否则会显示旧图块
+        return with_dependents([key for key in TARGETS if key in only], plan_targets(config))
+    formats = config.get("formats", {})
+    return [key for key in TARGETS if formats.get(key, True)]
+
+
+def with_dependents(selected, candidates):
+    """任一源图目标在 selected 中时，追加 candidates 中依赖 dist 的目标（保持 TARGETS 顺序）"""
+    if any("source" in TARGETS[k]["inputs"] for k in selected):
+        dependents = {k for k in candidates if "dist" in TARGETS[k]["inputs"]}
+        selected = [k for k in TARGETS if k in selected or k in dependents]
+    return selected
+
+
+def planned_sizes(targets):
+    """目标需要从源图缩放出的全部正方形尺寸（去重、升序），resample.py 基准默认使用"""
+    sizes = set()
+    for key in targets:
+        sizes.update(TARGETS[key].get("sizes", ()))
+    return sorted(sizes)
+
+
+def affected_targets(changed_inputs, changed_config, planned):
+    """
+    根据变化的输入与配置键，返回需要重新生成的目标
+    任一栅格目标重新生成后，依赖 dist 的目标（预览索引）也需要刷新
+    """
+    affected = []
+    for key in planned:
+        spec = TARGETS[key]
+        if set(spec["inputs"]) & changed_inputs or set(spec.get("config", ())) & changed_config:
+            affected.append(key)
+    return with_dependents(affected, planned)
+
+
+def run_target(key, source_img, project_root, dist_dir, config):
+    """执行单个生成目标"""
+    spec = TARGETS[key]
+    output_dir = os.path.join(dist_dir, spec["dir"])
+    generator = spec["generator"]
+    if "dist" in spec["inputs"]:
+        # 读取其它目标的输出前，等待排队中的写入落盘
+        _sink().flush()
+    if key == "svg":
+        generator(project_root, output_dir, config)
+    elif key == "preview":
+        generator(dist_dir)
+    elif "config" in spec:
+        generator(source_img, output_dir, config)
+    else:
+        generator(source_img, output_dir)
+
+
+# ============================================================
+# 输出集合复用
+# ============================================================
+
+def dedupe_options(config):
+    options = dict(DEDUPE_OPTIONS)
+    options.update(config.get("dedupe", {}))
+    return options
+
+
+def _source_targets(targets):
+    return [k for k in targets if "source" in TARGETS[k]["inputs"]]
+
+
+def output_set_key(source_img, targets, config):
+    """
+    一整套源图输出的缓存键
+    由像素指纹（与 PNG 元数据、压缩级别、颜色类型无关）、目标、相关配置、
+    --sizes、滤镜、工具版本与本脚本内容组成
+    """
+    import hashlib
+
+    keys = _source_targets(targets)
+    config_keys = sorted({c for k in keys for c in TARGETS[k].get("config", ())})
+    with open(os.path.abspath(__file__), "rb") as f:
+        code = hashlib.sha256(f.read()).hexdigest()
+    return RasterCache.key("set", source_fingerprint(source_img), keys,
+                           {c: config.get(c) for c in config_keys},
+                           sorted(_size_filter or ()), RESAMPLE_FILTER, tool_version(), code)
+
+
+def restore_output_set(source_img, targets, dist_dir, config):
+    """像素相同的源图已生成过完整输出时直接还原，返回是否已还原"""
+    if _raster_cache is None or not dedupe_options(config)["reuse_output_sets"]:
+        return False
+    files = _raster_cache.get_set(output_set_key(source_img, targets, config))
+    if files is None:
+        return False
+    for rel, data in sorted(files.items()):
+        path = os.path.join(dist_dir, rel)
+        ensure_dir(os.path.dirname(path))
+        write_bytes(path, data)
+    print(f"\n♻️  源图像素与已缓存的输出集合相同（指纹 {source_fingerprint(source_img)[:12]}）")
+    print(f"  ✅ 已还原 {', '.join(_source_targets(targets))}（{len(files)} 个文件）")
+    return True
+
+
+def store_output_set(source_img, targets, dist_dir, config, recorded):
+    """保存本次生成的源图输出，供之后像素相同的源图复用"""
+    if _raster_cache is None or not dedupe_options(config)["reuse_output_sets"]:
+        return
+    dirs = {TARGETS[k]["dir"] for k in _source_targets(targets)}
+    files = {}
+    for path, data in recorded.items():
+        rel = os.path.relpath(path, dist_dir).replace(os.sep, "/")
+        if rel.split("/", 1)[0] in dirs:
+            files[rel] = data
+    if files:
+        _raster_cache.put_set(output_set_key(source_img, targets, config), files)
+
+
+def check_near_duplicates(source_img, source_label, config):
+    """记录源图，并提示感知哈希接近但像素不同的已知源图"""
+    max_distance = dedupe_options(config)["near_duplicate_distance"]
+    if _raster_cache is None or not max_distance:
+        return
+    fingerprint = source_fingerprint(source_img)
+    phash = perceptual_hash(source_img)
+    matches = _raster_cache.similar_sources(fingerprint, phash, max_distance)
+    if matches:
+        print(f"\n🔎 可能是近似重复的源图（dHash 距离 ≤ {max_distance}），请人工确认:")
+        for distance, record in matches[:5]:
+            seen = time.strftime("%Y-%m-%d %H:%M", time.localtime(record["time"]))
+            print(f"  ⚠️  距离 {distance} · {record['label']} · "
+                  f"指纹 {record['fingerprint'][:12]} · {seen}")
+    _raster_cache.record_source(fingerprint, phash, source_label)
+
+
+# ============================================================
+# 主流程
+# ============================================================
 
-    # 查找源图标
+def resolve_source(project_root, config):
+    """定位源图标，缺少 PNG 时尝试从 SVG 生成"""
     source_path = os.path.join(project_root, config.get("source", "src/icon.png"))
 
     if not os.path.exists(source_path):
@@ -458,70 +1010,277 @@ def main():
             print(f"❌ 未找到源图标文件: {source_path}")
             print("请将 1024x1024 PNG 放到 src/icon.png")
             sys.exit(1)
+    return source_path
 
-    print("🎨 图标资源生成工具")
-    print("=" * 50)
-    print(f"📁 源文件: {source_path}")
 
-    # 加载源图标
-    source_img = Image.open(source_path).convert("RGBA")
+def load_source(source_path):
+    """加载源图标"""
+    from PIL import Image
+
+    from reproducible import strip_metadata
+
+    # 只保留像素：源文件的 ICC / EXIF / 文本块不应进入输出，否则输出随源文件元数据变化
+    source_img = strip_metadata(Image.open(source_path).convert("RGBA"))
     print(f"📐 源尺寸: {source_img.size[0]}x{source_img.size[1]}")
 
     if source_img.size[0] < 512 or source_img.size[1] < 512:
         print("⚠️  建议使用至少 1024x1024 的源图标以获得最佳质量")
+    return source_img
+
+
+def _parse_list(value, convert=str):
+    return [convert(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="从源图标生成所有平台的图标资源")
+    parser.add_argument("--only", metavar="TARGETS",
+                        help="只生成指定目标，逗号分隔，如 favicon,pwa（可用 --list 查看）")
+    parser.add_argument("--sizes", metavar="SIZES",
+                        help="只生成指定尺寸，逗号分隔，如 16,32（非方形输出按宽度匹配）")
+    parser.add_argument("--list", action="store_true",
+                        help="列出所有目标及其尺寸后退出")
+    parser.add_argument("--watch", action="store_true",
+                        help="生成后监听 src/、templates/ 与 config.json，增量重新生成")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读写持久化栅格缓存")
+    parser.add_argument("--out", metavar="DIR",
+                        help="输出目录（默认 dist/）")
+    parser.add_argument("--source", metavar="PNG",
+                        help="源图标路径（默认读取 config.json 的 source）")
+    args = parser.parse_args(argv)
+
+    if args.only:
+        aliases = target_aliases()
+        unknown = [t for t in _parse_list(args.only) if t not in aliases]
+        if unknown:
+            parser.error(f"未知目标: {', '.join(unknown)}（可选: {', '.join(TARGETS)}）")
+        args.only = {aliases[t] for t in _parse_list(args.only)}
+    if args.sizes:
+        try:
+            args.sizes = set(_parse_list(args.sizes, int))
+        except ValueError:
+            parser.error(f"--sizes 只接受整数: {args.sizes}")
+    return args
+
+
+def list_targets(config):
+    """打印目标列表（不加载任何图像库）"""
+    enabled = plan_targets(config)
+    for key, spec in TARGETS.items():
+        mark = "✅" if key in enabled else "⏸️ "
+        print(f"  {mark} {key:<12} → dist/{spec['dir']}/")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if args.source:
+        _config_overrides["source"] = os.path.abspath(args.source)
+    config = load_config(project_root)
 
-    dist_dir = os.path.join(project_root, "dist")
-    formats = config.get("formats", {})
-
-    # 清空并重建输出目录
-    if os.path.exists(dist_dir):
-        shutil.rmtree(dist_dir)
-
-    # === 生成各类图标 ===
-
-    if formats.get("windows_ico", True):
-        generate_windows_ico(source_img, os.path.join(dist_dir, "windows"))
-
-    if formats.get("macos_icns", True):
-        generate_macos_icons(source_img, os.path.join(dist_dir, "macos"))
-
-    if formats.get("favicon", True):
-        generate_favicon(source_img, os.path.join(dist_dir, "favicon"))
+    if args.list:
+        list_targets(config)
+        return
 
-    if formats.get("apple_touch", True):
-        generate_apple_touch(source_img, os.path.join(dist_dir, "apple-touch"))
+    _require_pillow()
+    targets = plan_targets(config, args.only)
+    needs_source = any("source" in TARGETS[k]["inputs"] for k in targets)
 
-    if formats.get("android", True):
-        generate_android(source_img, os.path.join(dist_dir, "android"))
+    print("🎨 图标资源生成工具")
+    print("=" * 50)
 
-    if formats.get("pwa", True):
-        generate_pwa(source_img, os.path.join(dist_dir, "pwa"), config)
+    # 只生成 SVG / 预览时不需要解码源图
+    source_path = os.path.join(project_root, config.get("source", "src/icon.png"))
+    source_img = None
+    if needs_source:
+        source_path = resolve_source(project_root, config)
+        print(f"📁 源文件: {source_path}")
+        source_img = load_source(source_path)
+
+    dist_dir = os.path.abspath(args.out) if args.out else os.path.join(project_root, "dist")
+    partial = bool(args.only or args.sizes)
+
+    # 完整构建时清空并重建输出目录；--only / --sizes 只覆盖选中的文件
+    if not partial and os.path.exists(dist_dir):
+        import shutil
+        shutil.rmtree(dist_dir)
 
-    if formats.get("png_sizes", True):
-        generate_png_sizes(source_img, os.path.join(dist_dir, "png"))
+    # === 生成各类图标 ===
+    global _output_sink, _raster_cache, _size_filter, _recorded
+    _output_sink = OutputSink.from_config(config)
+    _size_filter = args.sizes or None
+    if not args.no_cache:
+        _raster_cache = RasterCache.from_config(project_root, config)
+    configure_resample(config)
+
+    # 生成过程中出错时也要等写入线程把已排队的文件写完再退出
+    with _output_sink:
+        restored = False
+        if source_img is not None:
+            check_near_duplicates(source_img, os.path.relpath(source_path, project_root), config)
+            restored = restore_output_set(source_img, targets, dist_dir, config)
+            if not restored:
+                _recorded = {}
+        for key in targets:
+            if restored and "source" in TARGETS[key]["inputs"]:
+                continue
+            run_target(key, source_img, project_root, dist_dir, config)
+        if _recorded is not None:
+            store_output_set(source_img, targets, dist_dir, config, _recorded)
+            _recorded = None
+        _output_sink.flush()
+        if _raster_cache is not None:
+            _raster_cache.prune_if_written()
+
+        # 总结
+        print()
+        print("=" * 50)
+        print("🎉 所有图标生成完成!")
+        print(f"📁 输出目录: {dist_dir}")
+        print(_output_sink.report())
+        if _raster_cache is not None:
+            print(_raster_cache.report())
+
+        # 统计文件数
+        total_files = 0
+        for root, dirs, files in os.walk(dist_dir):
+            total_files += len(files)
+        print(f"📊 共生成 {total_files} 个文件")
+        print()
+        print("💡 提示: 运行 python -m http.server 8000 后访问 "
+              "http://localhost:8000/preview.html 预览所有图标")
+
+        if args.watch:
+            watch(project_root, dist_dir, config, source_path, source_img, args.only)
 
-    if formats.get("svg", True):
-        generate_svg(project_root, os.path.join(dist_dir, "svg"))
 
-    if formats.get("electron", True):
-        generate_electron(source_img, os.path.join(dist_dir, "electron"))
+# ============================================================
+# 监听模式
+# ============================================================
 
-    if formats.get("social", True):
-        generate_social(source_img, os.path.join(dist_dir, "social"), config)
+def _classify_changes(changed, project_root, source_path):
+    """将变化的文件归类为 source / svg / config 输入"""
+    src_svg = os.path.join(project_root, "src", "icon.svg")
+    templates_dir = os.path.join(project_root, "templates")
+    inputs = set()
+    for path in changed:
+        if path == os.path.abspath(source_path):
+            inputs.add("source")
+        elif path == os.path.join(project_root, "config.json"):
+            inputs.add("config")
+        elif path.endswith(".svg") and (path == src_svg or os.path.dirname(path) == templates_dir):
+            inputs.add("svg")
+    return inputs
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def watch(project_root, dist_dir, config, source_path, source_img, only=None):
+    """
+    监听源文件变化并增量重新生成
+    源图与缩放缓存常驻内存，只重新执行受影响的目标
+    """
+    from generate_svg import try_cairosvg
+    from watcher import FileWatcher
 
-    # 总结
-    print()
-    print("=" * 50)
-    print("🎉 所有图标生成完成!")
-    print(f"📁 输出目录: {dist_dir}")
-
-    # 统计文件数
-    total_files = 0
-    for root, dirs, files in os.walk(dist_dir):
-        total_files += len(files)
-    print(f"📊 共生成 {total_files} 个文件")
+    src_dir = os.path.join(project_root, "src")
+    templates_dir = os.path.join(project_root, "templates")
+    config_path = os.path.join(project_root, "config.json")
+    state = {"config": config, "source_path": source_path, "source_img": source_img,
+             "source_stat": _stat_key(source_path)}
+
+    def on_change(changed):
+        start = time.perf_counter()
+        inputs = _classify_changes(changed, project_root, state["source_path"])
+        changed_config = set()
+        # 本进程刚写入并已加载的源图再次触发事件时无需重复生成
+        if "source" in inputs and _stat_key(state["source_path"]) == state["source_stat"]:
+            inputs.discard("source")
+
+        if "config" in inputs:
+            try:
+                new_config = load_config(project_root)
+            except ValueError as e:
+                print(f"\n⚠️  config.json 解析失败，已忽略: {e}")
+                return
+            old_config = state["config"]
+            changed_config = {k for k in set(old_config) | set(new_config)
+                              if old_config.get(k) != new_config.get(k)}
+            state["config"] = new_config
+            if "source" in changed_config:
+                # 不调用 resolve_source：找不到源文件时它会退出进程
+                state["source_path"] = os.path.join(
+                    project_root, new_config.get("source", "src/icon.png"))
+                inputs.add("source")
+            if "resample" in changed_config:
+                # 重新加载源图，使内存中的缩放结果随之失效
+                configure_resample(new_config)
+                inputs.add("source")
+
+        # 修改 SVG 时只重新栅格化对应的那一个文件
+        for path in sorted(changed):
+            if not path.endswith(".svg"):
+                continue
+            if path == os.path.join(src_dir, "icon.svg"):
+                if try_cairosvg(path, state["source_path"]):
+                    print(f"\n  🔁 icon.svg → {os.path.basename(state['source_path'])}")
+                    inputs.add("source")
+            elif os.path.dirname(path) == templates_dir:
+                png_path = os.path.join(src_dir, os.path.basename(path)[:-4] + ".png")
+                if try_cairosvg(path, png_path):
+                    print(f"\n  🔁 {os.path.basename(path)} → {os.path.basename(png_path)}")
+
+        if "source" in inputs:
+            if not os.path.exists(state["source_path"]):
+                print(f"\n⚠️  未找到源图标文件: {state['source_path']}，等待下一次变更")
+                return
+            print(f"\n📁 源文件已变化: {state['source_path']}")
+            state["source_img"] = load_source(state["source_path"])
+            state["source_stat"] = _stat_key(state["source_path"])
+
+        planned = plan_targets(state["config"], only)
+        targets = affected_targets(inputs, changed_config, planned)
+
+        # 格式开关变化：新启用的目标生成，被关闭的目标删除（--only 时不受开关影响）
+        if "formats" in changed_config and not only:
+            import shutil
+
+            for key in TARGETS:
+                output_dir = os.path.join(dist_dir, TARGETS[key]["dir"])
+                if key not in planned and os.path.exists(output_dir):
+                    shutil.rmtree(output_dir)
+                    print(f"\n🗑️  已删除 {TARGETS[key]['dir']}/")
+            toggled = {k for k in planned
+                       if not os.path.exists(os.path.join(dist_dir, TARGETS[k]["dir"]))}
+            targets = [k for k in planned if k in targets or k in toggled
+                       or "dist" in TARGETS[k]["inputs"]]
+
+        if not targets:
+            return
+        for key in targets:
+            run_target(key, state["source_img"], project_root, dist_dir, state["config"])
+        _sink().flush()
+        if _raster_cache is not None:
+            _raster_cache.prune_if_written()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n⚡ 已重新生成 {', '.join(targets)}（{elapsed:.0f} ms）")
+
+    watcher = FileWatcher([src_dir, templates_dir, config_path], on_change)
     print()
-    print("💡 提示: 用浏览器打开 preview.html 预览所有图标")
+    print(f"👀 监听中（{watcher.backend}）: src/ templates/ config.json，按 Ctrl+C 退出")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n👋 已退出监听")
 
 
 if __name__ == "__main__":
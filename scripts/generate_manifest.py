@@ -6,6 +6,8 @@ import json
 import os
 import sys
 
+from compress_assets import remove_variants
+
 
 def main():
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -47,6 +49,7 @@ def main():
     output_path = os.path.join(project_root, "dist", "pwa", "manifest.json")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
+    remove_variants(output_path)
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(manifest, f, indent=2, ensure_ascii=False)
 
@@ -66,6 +69,7 @@ def main():
 </browserconfig>""".format(theme_color=theme_color)
 
     bc_path = os.path.join(project_root, "dist", "pwa", "browserconfig.xml")
+    remove_variants(bc_path)
     with open(bc_path, "w", encoding="utf-8") as f:
         f.write(browserconfig)
     print(f"✅ browserconfig.xml 已生成: {bc_path}")
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+端到端负载测试
+以 N 个并发进程反复运行完整的 generate_icons.py，源图为合成图像
+（512 ~ 8192 像素，不透明与透明两种），所有输出写入临时目录。
+
+记录：
+    每个任务的延迟（从启动进程到退出）、峰值常驻内存、写入的字节数
+汇总：
+    p50 / p95 / p99 延迟、吞吐（套 / 秒）、峰值 RSS、写入字节，按源图规格分组
+结果保存为 JSON，可用 --compare 与之前的结果对比，超出阈值时以非零状态退出。
+
+用法:
+    python scripts/loadtest.py --concurrency 4 --jobs 20 -o loadtest.json
+    python scripts/loadtest.py --sizes 512,1024 --modes transparent --compare loadtest.json
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+RESULT_VERSION = 1
+
+DEFAULT_SIZES = [512, 1024, 2048, 4096, 8192]
+SOURCE_MODES = ("opaque", "transparent")
+
+# --compare 时参与比较的汇总指标及其“变好”的方向
+COMPARED_METRICS = {
+    "latency_p50": "lower",
+    "latency_p95": "lower",
+    "latency_p99": "lower",
+    "throughput_sets_per_second": "higher",
+    "peak_rss_bytes": "lower",
+    "disk_bytes_per_set": "lower",
+}
+
+
+# ============================================================
+# 合成源图
+# ============================================================
+
+def synthesize_source(size, mode, path):
+    """
+    生成确定性的合成源图
+    opaque      渐变背景上的几何图形（RGB 内容，alpha 全为 255）
+    transparent 透明背景上的圆角图形，边缘带 alpha 渐变
+    """
+    from PIL import Image, ImageDraw
+
+    scale = size / 512
+    gradient = Image.linear_gradient("L").resize((size, size))
+    img = Image.merge("RGB", (gradient, gradient.rotate(90), gradient.rotate(180))).convert("RGBA")
+    draw = ImageDraw.Draw(img)
+    for i in range(6):
+        inset = int((40 + i * 28) * scale)
+        color = (40 * i % 256, 255 - 30 * i, 90 + 25 * i, 255)
+        draw.ellipse((inset, inset, size - inset, size - inset), outline=color,
+                     width=max(1, int(6 * scale)))
+    draw.rounded_rectangle((size // 4, size // 4, size * 3 // 4, size * 3 // 4),
+                           radius=size // 10, fill=(250, 250, 250, 255))
+
+    if mode == "transparent":
+        from PIL import ImageChops
+
+        mask = Image.new("L", (size, size), 0)
+        ImageDraw.Draw(mask).rounded_rectangle(
+            (size // 16, size // 16, size * 15 // 16, size * 15 // 16),
+            radius=size // 5, fill=255)
+        # 由中心向外逐渐变淡，覆盖半透明像素的缩放路径
+        fade = Image.radial_gradient("L").resize((size, size)).point(lambda v: 255 - v // 2)
+        img.putalpha(ImageChops.multiply(mask, fade))
+    img.save(path, compress_level=1)
+    return path
+
+
+def _source_key(size, mode):
+    return f"{size}-{mode}"
+
+
+# ============================================================
+# 执行任务
+# ============================================================
+
+def _tree_bytes(root):
+    total = 0
+    for dirpath, dirs, files in os.walk(root):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _wait(proc):
+    """等待子进程退出，返回 (退出码, 峰值 RSS 字节数；平台不支持时为 None)"""
+    if not hasattr(os, "wait4"):
+        return proc.wait(), None
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return proc.returncode, rss
+
+
+def run_job(index, source_key, source_path, work_dir, project_root, extra_args):
+    """运行一次完整生成，返回任务记录"""
+    job_dir = os.path.join(work_dir, f"job-{index:04d}")
+    out_dir = os.path.join(job_dir, "dist")
+    os.makedirs(job_dir)
+    command = [sys.executable, os.path.join(project_root, "scripts", "generate_icons.py"),
+               "--source", source_path, "--out", out_dir] + list(extra_args)
+    env = dict(os.environ)
+    # 每个任务独立的栅格缓存目录，避免并发任务之间互相命中
+    env["TUBIAO_CACHE_DIR"] = os.path.join(job_dir, "cache")
+
+    with open(os.path.join(job_dir, "stderr.log"), "wb") as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(command, cwd=project_root, env=env,
+                                stdout=subprocess.DEVNULL, stderr=stderr)
+        returncode, rss = _wait(proc)
+        latency = time.perf_counter() - start
+
+    record = {
+        "index": index,
+        "source": source_key,
+        "ok": returncode == 0,
+        "latency_seconds": round(latency, 4),
+        "peak_rss_bytes": rss,
+        "disk_bytes": _tree_bytes(out_dir),
+        "files": sum(len(files) for _, _, files in os.walk(out_dir)),
+    }
+    if returncode != 0:
+        with open(os.path.join(job_dir, "stderr.log"), "r", encoding="utf-8",
+                  errors="replace") as f:
+            record["error"] = f.read()[-2000:]
+    return record
+
+
+# ============================================================
+# 统计
+# ============================================================
+
+def percentile(values, p):
+    """最近秩法百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(records, wall_seconds=None):
+    ok = [r for r in records if r["ok"]]
+    latencies = [r["latency_seconds"] for r in ok]
+    rss = [r["peak_rss_bytes"] for r in ok if r["peak_rss_bytes"] is not None]
+    summary = {
+        "jobs": len(records),
+        "failed": len(records) - len(ok),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "latency_mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "latency_max": max(latencies, default=None),
+        "peak_rss_bytes": max(rss, default=None),
+        "peak_rss_p50": percentile(rss, 50),
+        "disk_bytes": sum(r["disk_bytes"] for r in ok),
+        "disk_bytes_per_set": sum(r["disk_bytes"] for r in ok) // len(ok) if ok else None,
+    }
+    if wall_seconds is not None:
+        summary["wall_seconds"] = round(wall_seconds, 4)
+        summary["throughput_sets_per_second"] = (
+            round(len(ok) / wall_seconds, 4) if wall_seconds > 0 else None)
+    return summary
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import PIL
+        info["pillow"] = PIL.__version__
+    except ImportError:
+        pass
+    try:
+        import numpy
+        info["numpy"] = numpy.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def compare(current, baseline, threshold):
+    """与基准结果对比汇总指标，返回变差超过阈值的指标列表"""
+    regressions = []
+    print(f"\n📊 与基准对比（阈值 {threshold:.0%}）")
+    if baseline.get("parameters") != current["parameters"]:
+        print("  ⚠️  两次测试的参数不同，结果可能不可比")
+    if baseline.get("environment") != current["environment"]:
+        print("  ⚠️  两次测试的运行环境不同")
+    for metric, better in COMPARED_METRICS.items():
+        new, old = current["summary"].get(metric), baseline.get("summary", {}).get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        worse = change > threshold if better == "lower" else change < -threshold
+        mark = "❌" if worse else "✅"
+        print(f"  {mark} {metric:<28} {old:>14,.4g} → {new:<14,.4g} ({change:+.1%})")
+        if worse:
+            regressions.append(metric)
+    return regressions
+
+
+def _format_bytes(n):
+    if n is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def _print_summary(title, s):
+    def ms(v):
+        return "-" if v is None else f"{v * 1000:.0f} ms"
+
+    line = (f"  {title:<18} p50 {ms(s['latency_p50']):>8} · p95 {ms(s['latency_p95']):>8} · "
+            f"p99 {ms(s['latency_p99']):>8} · RSS {_format_bytes(s['peak_rss_bytes']):>9}")
+    if s["failed"]:
+        line += f" · ❌ {s['failed']} 失败"
+    print(line)
+
+
+# ============================================================
+# 入口
+# ============================================================
+
+def main():
+    import argparse
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="generate_icons.py 端到端负载测试")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="并发任务数（默认 4）")
+    parser.add_argument("-n", "--jobs", type=int, help="任务总数（默认每种源图规格 2 个）")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="合成源图边长，逗号分隔")
+    parser.add_argument("--modes", default=",".join(SOURCE_MODES),
+                        help="opaque / transparent，逗号分隔")
+    parser.add_argument("--cache", action="store_true",
+                        help="任务内启用栅格缓存（默认 --no-cache，测量冷生成）")
+    parser.add_argument("--generator-args", default="",
+                        help="附加给 generate_icons.py 的参数，如 \"--only favicon,pwa\"")
+    parser.add_argument("-o", "--output", help="结果 JSON 路径")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前的结果 JSON 对比")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="对比时允许的相对变差（默认 0.2 即 20%%）")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in SOURCE_MODES]
+    if unknown:
+        parser.error(f"未知模式: {', '.join(unknown)}")
+    variants = [(size, mode) for size in sizes for mode in modes]
+    total = args.jobs or len(variants) * 2
+    extra_args = ([] if args.cache else ["--no-cache"]) + args.generator_args.split()
+
+    work_dir = tempfile.mkdtemp(prefix="tubiao-loadtest-")
+    try:
+        print(f"🧪 负载测试: {total} 个任务，并发 {args.concurrency}，临时目录 {work_dir}")
+        sources = {}
+        for size, mode in variants:
+            key = _source_key(size, mode)
+            sources[key] = synthesize_source(size, mode, os.path.join(work_dir, f"source-{key}.png"))
+            print(f"  🖼️  {key} 源图已生成")
+
+        # 轮流分配源图规格，保证每种规格都被覆盖
+        jobs = [(i, _source_key(*variants[i % len(variants)])) for i in range(total)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            records = list(pool.map(
+                lambda job: run_job(job[0], job[1], sources[job[1]], work_dir,
+                                    project_root, extra_args),
+                jobs))
+        wall = time.perf_counter() - start
+    finally:
+        if args.keep:
+            print(f"📁 保留临时目录: {work_dir}")
+        else:
+            import shutil
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {
+        "version": RESULT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "parameters": {
+            "concurrency": args.concurrency,
+            "jobs": total,
+            "sizes": sizes,
+            "modes": modes,
+            "cache": args.cache,
+            "generator_args": args.generator_args,
+        },
+        "environment": environment(),
+        "summary": summarize(records, wall),
+        "by_source": {
+            _source_key(size, mode): summarize(
+                [r for r in records if r["source"] == _source_key(size, mode)])
+            for size, mode in variants
+        },
+        "jobs": records,
+    }
+
+    s = result["summary"]
+    print()
+    print(f"⏱️  {s['jobs'] - s['failed']}/{s['jobs']} 个任务完成，用时 {s['wall_seconds']:.2f}s，"
+          f"吞吐 {s['throughput_sets_per_second']} 套/秒")
+    print(f"💾 写入 {_format_bytes(s['disk_bytes'])}（每套 {_format_bytes(s['disk_bytes_per_set'])}）")
+    _print_summary("全部", s)
+    for key, group in result["by_source"].items():
+        _print_summary(key, group)
+    for r in records:
+        if not r["ok"]:
+            print(f"\n❌ 任务 {r['index']}（{r['source']}）失败:\n{r.get('error', '')}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"📄 {args.output}")
+
+    status = 0 if not s["failed"] else 1
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
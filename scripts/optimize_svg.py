@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+SVG 优化脚本
+在不改变渲染结果的前提下缩减 SVG 体积
+
+- 删除注释、<metadata> 及编辑器私有命名空间的元素 / 属性
+- 坐标类数值按配置精度取整
+- 展开无属性的 <g>，合并只有一个子元素的 <g>
+- 合并内容相同的渐变定义，并改写 url(#id) / href 引用
+- 去除元素间的空白
+
+优化结果必须经 cairosvg 在多个尺寸下栅格化比对：差异超出容差、cairosvg 不可用
+（除非显式允许跳过校验）或源文件无法解析时，均输出原文件。
+"""
+
+import argparse
+import os
+import re
+import xml.etree.ElementTree as ET
+
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+ET.register_namespace("", SVG_NS)
+ET.register_namespace("xlink", XLINK_NS)
+
+# 编辑器私有命名空间（Inkscape / Sodipodi / Illustrator / Sketch 等）
+EDITOR_NAMESPACES = {
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://ns.adobe.com/AdobeIllustrator/10.0/",
+    "http://ns.adobe.com/AdobeSVGViewerExtensions/3.0/",
+    "http://www.bohemiancoding.com/sketch/ns",
+    "http://purl.org/dc/elements/1.1/",
+    "http://creativecommons.org/ns#",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+}
+
+# 需要取整的坐标类属性
+COORD_ATTRS = {
+    "x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry", "fx", "fy",
+    "width", "height", "points", "d", "transform", "viewBox", "stroke-width",
+}
+
+# 作用于整组合成结果的属性，不能随意下放到子元素
+GROUP_ONLY_ATTRS = {"opacity", "filter", "mask", "clip-path", "id", "class", "style"}
+
+GRADIENT_TAGS = {f"{{{SVG_NS}}}linearGradient", f"{{{SVG_NS}}}radialGradient"}
+
+DEFAULT_OPTIONS = {
+    "enabled": True,
+    "precision": 2,
+    "verify_sizes": [16, 64, 256],
+    # 单个像素每通道绝对误差上限（0-255）；取整只会让边缘的抗锯齿略有变化，
+    # 细节消失则会在局部产生接近满幅的误差
+    "tolerance": 16,
+    # cairosvg 不可用时是否仍输出未经校验的优化结果
+    "allow_unverified": False,
+}
+
+_NUMBER_RE = re.compile(r"-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+_URL_RE = re.compile(r"url\(\s*#([^)\s]+)\s*\)")
+
+
+def _namespace(name):
+    """返回 '{ns}local' 形式名称中的命名空间"""
+    if name.startswith("{"):
+        return name[1:].split("}", 1)[0]
+    return None
+
+
+def _format_number(value, precision):
+    """按精度格式化数字并去掉多余的 0"""
+    text = f"{round(value, precision):.{precision}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def round_numbers(value, precision):
+    """
+    将属性值中的所有数字按精度取整
+    原文中紧挨着的数字依靠 "-" 或 "." 分隔（如 "5-0.001"、"5.004.5"），
+    取整后这些字符可能消失，此时补一个空格以免两个数字粘连
+    """
+    def replace(m):
+        text = _format_number(float(m.group(0)), precision)
+        start = m.start()
+        if start and not text.startswith("-"):
+            previous = value[start - 1]
+            if previous.isdigit() or previous == ".":
+                text = " " + text
+        return text
+
+    return _NUMBER_RE.sub(replace, value)
+
+
+def _strip_editor_data(elem):
+    """删除 metadata、编辑器元素和属性"""
+    for child in list(elem):
+        if not isinstance(child.tag, str):
+            # 注释 / 处理指令
+            elem.remove(child)
+        elif child.tag == f"{{{SVG_NS}}}metadata" or _namespace(child.tag) in EDITOR_NAMESPACES:
+            elem.remove(child)
+        else:
+            _strip_editor_data(child)
+    for name in list(elem.attrib):
+        if _namespace(name) in EDITOR_NAMESPACES:
+            del elem.attrib[name]
+
+
+def _round_coordinates(elem, precision):
+    """坐标类属性取整，并压缩分隔符两侧的空白"""
+    for e in elem.iter():
+        for name, value in e.attrib.items():
+            if name in COORD_ATTRS:
+                value = round_numbers(value, precision)
+                value = re.sub(r"\s*,\s*", ",", value)
+                e.set(name, re.sub(r"\s+", " ", value).strip())
+
+
+def _collapse_groups(parent):
+    """展开无属性的 <g>，合并只有一个子元素的 <g>"""
+    index = 0
+    while index < len(parent):
+        child = parent[index]
+        _collapse_groups(child)
+        if child.tag != f"{{{SVG_NS}}}g":
+            index += 1
+            continue
+
+        if not child.attrib:
+            parent.remove(child)
+            for offset, grandchild in enumerate(list(child)):
+                parent.insert(index + offset, grandchild)
+            continue
+
+        if len(child) == 1 and not (set(child.attrib) & GROUP_ONLY_ATTRS):
+            only = child[0]
+            if all(name == "transform" or name not in only.attrib for name in child.attrib):
+                for name, value in child.attrib.items():
+                    if name == "transform" and "transform" in only.attrib:
+                        # 父变换在前：effective = parent × child
+                        value = f"{value} {only.get('transform')}"
+                    only.set(name, value)
+                only.tail = child.tail
+                parent.remove(child)
+                parent.insert(index, only)
+                continue
+        index += 1
+
+
+def _gradient_signature(elem):
+    """渐变定义的内容签名（忽略 id）"""
+    attrs = tuple(sorted((k, v) for k, v in elem.attrib.items() if k != "id"))
+    stops = tuple(
+        (stop.tag, tuple(sorted(stop.attrib.items()))) for stop in elem
+    )
+    return (elem.tag, attrs, stops)
+
+
+def _dedupe_gradients(root):
+    """合并内容相同的渐变并改写引用"""
+    seen = {}
+    aliases = {}
+    parents = {child: parent for parent in root.iter() for child in parent}
+    for elem in list(root.iter()):
+        if elem.tag not in GRADIENT_TAGS or elem.get("id") is None:
+            continue
+        signature = _gradient_signature(elem)
+        if signature in seen:
+            aliases[elem.get("id")] = seen[signature]
+            parents[elem].remove(elem)
+        else:
+            seen[signature] = elem.get("id")
+
+    if not aliases:
+        return 0
+
+    href_names = ("href", f"{{{XLINK_NS}}}href")
+    for elem in root.iter():
+        for name, value in elem.attrib.items():
+            if name in href_names and value.startswith("#") and value[1:] in aliases:
+                elem.set(name, "#" + aliases[value[1:]])
+            elif "url(" in value:
+                elem.set(name, _URL_RE.sub(
+                    lambda m: f"url(#{aliases.get(m.group(1), m.group(1))})", value))
+    return len(aliases)
+
+
+def _strip_whitespace(elem):
+    """去除元素间的空白（保留 <text> 等内容文本）"""
+    if elem.text is not None and not elem.text.strip():
+        elem.text = None
+    for child in elem:
+        _strip_whitespace(child)
+        if child.tail is not None and not child.tail.strip():
+            child.tail = None
+
+
+def optimize_svg(data, precision=2):
+    """
+    优化 SVG 文本
+    data: bytes 或 str，返回优化后的 bytes
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    root = ET.fromstring(data)
+
+    _strip_editor_data(root)
+    _round_coordinates(root, precision)
+    _collapse_groups(root)
+    _dedupe_gradients(root)
+    # 合并后可能留下空的 <defs>
+    for parent in list(root.iter()):
+        for child in list(parent):
+            if child.tag == f"{{{SVG_NS}}}defs" and len(child) == 0:
+                parent.remove(child)
+    _strip_whitespace(root)
+
+    # 属性与文本中的 ">" 均已转义，" />" 只会出现在自闭合标签处
+    return ET.tostring(root, encoding="utf-8", xml_declaration=False).replace(b" />", b"/>")
+
+
+# cairosvg 加载结果缓存：None 表示尚未尝试，False 表示不可用
+_cairosvg = None
+
+
+def _load_cairosvg():
+    """加载 cairosvg（缺少模块或 Cairo 动态库时返回 False）"""
+    global _cairosvg
+    if _cairosvg is None:
+        try:
+            import cairosvg
+            _cairosvg = cairosvg
+        except (ImportError, OSError):
+            _cairosvg = False
+    return _cairosvg
+
+
+def _rasterize(data, size):
+    """用 cairosvg 将 SVG 渲染为 RGBA 图像"""
+    import io
+
+    from PIL import Image
+
+    png = _load_cairosvg().svg2png(bytestring=data, output_width=size, output_height=size)
+    return Image.open(io.BytesIO(png)).convert("RGBA")
+
+
+def verify_rasterization(original, optimized, sizes, tolerance):
+    """
+    比较优化前后在各尺寸下的栅格化结果
+    返回 (是否通过, {尺寸: 最大误差})；cairosvg 不可用时返回 (None, {})
+    """
+    if not _load_cairosvg():
+        return None, {}
+    from PIL import ImageChops
+
+    errors = {}
+    for size in sizes:
+        diff = ImageChops.difference(_rasterize(original, size),
+                                     _rasterize(optimized, size))
+        errors[size] = max(high for _, high in diff.getextrema())
+    return all(e <= tolerance for e in errors.values()), errors
+
+
+def _write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def optimize_svg_file(src_path, dest_path, options=None, write=_write_file):
+    """
+    优化单个 SVG 文件并写出
+    无法解析、校验失败或无法校验时回退为原文件内容；返回 (原字节数, 输出字节数)
+    write: 写出函数 write(path, data)，默认直接写文件
+    """
+    opts = dict(DEFAULT_OPTIONS)
+    opts.update(options or {})
+
+    with open(src_path, "rb") as f:
+        original = f.read()
+    name = os.path.basename(dest_path)
+
+    try:
+        optimized = optimize_svg(original, opts["precision"])
+    except ET.ParseError as e:
+        print(f"  ⚠️  {name} 无法解析（{e}），保留原文件")
+        write(dest_path, original)
+        return len(original), len(original)
+
+    passed, errors = verify_rasterization(
+        original, optimized, opts["verify_sizes"], opts["tolerance"])
+    if passed is False:
+        worst = max(errors.values())
+        print(f"  ⚠️  {name} 优化后渲染差异 {worst} 超出容差 {opts['tolerance']}，保留原文件")
+        optimized = original
+    elif passed is None and not opts["allow_unverified"]:
+        print(f"  ⚠️  {name} 无法校验（cairosvg 不可用），保留原文件")
+        optimized = original
+    elif len(optimized) >= len(original):
+        optimized = original
+
+    write(dest_path, optimized)
+
+    saved = len(original) - len(optimized)
+    note = "，未校验" if passed is None and optimized is not original else ""
+    print(f"  ✅ {name}  {len(original)} → {len(optimized)} B "
+          f"(-{saved * 100 // len(original)}%{note})")
+    return len(original), len(optimized)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="优化 SVG 文件")
+    parser.add_argument("files", nargs="+", help="待优化的 SVG 文件")
+    parser.add_argument("-o", "--out-dir", help="输出目录（默认原地覆盖）")
+    parser.add_argument("--precision", type=int, default=DEFAULT_OPTIONS["precision"],
+                        help="坐标保留的小数位数")
+    parser.add_argument("--tolerance", type=int, default=DEFAULT_OPTIONS["tolerance"],
+                        help="栅格化单像素误差上限（0-255）")
+    parser.add_argument("--allow-unverified", action="store_true",
+                        help="cairosvg 不可用时仍输出未经校验的优化结果")
+    args = parser.parse_args()
+
+    print("✏️  SVG 优化")
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    total_before = total_after = 0
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"  ⚠️  未找到 {path}")
+            continue
+        dest = os.path.join(args.out_dir, os.path.basename(path)) if args.out_dir else path
+        before, after = optimize_svg_file(path, dest, {
+            "precision": args.precision,
+            "tolerance": args.tolerance,
+            "allow_unverified": args.allow_unverified,
+        })
+        total_before += before
+        total_after += after
+
+    if total_before:
+        print(f"📊 共节省 {total_before - total_after} B "
+              f"({(total_before - total_after) * 100 // total_before}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+异步输出
+编码在调用线程完成，编码后的字节通过有界队列交给写入线程池落盘，
+使 CPU 密集的编码与文件 I/O 互相重叠。
+
+- 有界队列：队列满时 write() 阻塞调用方（背压），内存占用有上限
+- 原子写入：先写同目录临时文件，再 os.replace 替换目标
+- fsync 策略：
+    none   不调用 fsync（默认，与直接 img.save 一致）
+    batch  flush() 时集中 fsync 本批写入的文件及其所在目录
+    each   每个文件在替换前 fsync
+- 固定 mtime：设置 SOURCE_DATE_EPOCH 时写入的文件 mtime 统一为该时间（可复现构建）
+- 统计编码耗时与写入耗时，供构建报告分别展示
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+
+
+DEFAULT_OPTIONS = {
+    "writers": 4,
+    "queue_size": 32,
+    "fsync": "none",
+    "atomic": True,
+}
+
+FSYNC_MODES = ("none", "batch", "each")
+
+_STOP = object()
+
+
+class OutputSink:
+    """
+    输出通道
+
+    用法:
+        with OutputSink(writers=4) as sink:
+            data = sink.encode(img, "PNG")
+            sink.write(path, data)
+            sink.flush()        # 需要读取已写文件前调用
+        print(sink.report())
+
+    writers=0 时在调用线程内同步写入。
+    """
+
+    def __init__(self, writers=4, queue_size=32, fsync="none", atomic=True, mtime=None):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"fsync 必须是 {'/'.join(FSYNC_MODES)} 之一: {fsync}")
+        self.fsync = fsync
+        self.atomic = atomic
+        self.mtime = mtime
+        self.stats = {
+            "files": 0,
+            "bytes": 0,
+            "encode_seconds": 0.0,
+            "write_seconds": 0.0,
+            "fsync_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+        self._unsynced = []
+        self._error = None
+        self._queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._threads = []
+        for i in range(writers):
+            t = threading.Thread(target=self._worker, name=f"output-writer-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    @classmethod
+    def from_config(cls, config):
+        """按 config.json 中的 output 段创建，mtime 取自 SOURCE_DATE_EPOCH"""
+        from reproducible import source_date_epoch
+
+        options = dict(DEFAULT_OPTIONS)
+        options.update(config.get("output", {}))
+        return cls(mtime=source_date_epoch(), **options)
+
+    # -------------------------------------------------------- 写入接口
+
+    def encode(self, img, format="PNG", **params):
+        """在当前线程编码图像，计入编码耗时"""
+        start = time.perf_counter()
+        buf = io.BytesIO()
+        img.save(buf, format, **params)
+        self.stats["encode_seconds"] += time.perf_counter() - start
+        return buf.getvalue()
+
+    def write(self, path, data):
+        """提交一次写入；队列已满时阻塞直到有空位"""
+        self._raise_pending()
+        if self._threads:
+            self._queue.put((path, data))
+        else:
+            self._write_one(path, data)
+
+    def flush(self):
+        """等待已提交的写入完成，并按策略执行批量 fsync"""
+        if self._threads:
+            self._queue.join()
+        self._raise_pending()
+        if self.fsync == "batch":
+            with self._lock:
+                paths, self._unsynced = self._unsynced, []
+            start = time.perf_counter()
+            for p in paths:
+                _fsync_path(p)
+            for directory in sorted({os.path.dirname(p) for p in paths}):
+                _fsync_dir(directory)
+            self.stats["fsync_seconds"] += time.perf_counter() - start
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            for _ in self._threads:
+                self._queue.put(_STOP)
+            for t in self._threads:
+                t.join()
+            self._threads = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # 已有异常时不再掩盖，只停止写入线程
+            try:
+                self.close()
+            except Exception:
+                pass
+        return False
+
+    def report(self):
+        """构建报告中的耗时摘要"""
+        s = self.stats
+        text = (f"⏱️  编码 {s['encode_seconds']:.2f}s · 写入 {s['write_seconds']:.2f}s"
+                f"（{s['files']} 个文件，{s['bytes'] / 1024:.0f} KB）")
+        if self.fsync != "none":
+            text += f" · fsync {s['fsync_seconds']:.2f}s"
+        return text
+
+    # -------------------------------------------------------- 内部实现
+
+    def _raise_pending(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is None:
+                    self._write_one(*item)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write_one(self, path, data):
+        start = time.perf_counter()
+        target = path
+        if self.atomic:
+            directory, name = os.path.split(path)
+            target = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(target, "wb") as f:
+                f.write(data)
+                if self.fsync == "each":
+                    f.flush()
+                    os.fsync(f.fileno())
+            if self.mtime is not None:
+                os.utime(target, (self.mtime, self.mtime))
+            if self.atomic:
+                os.replace(target, path)
+        except BaseException:
+            if self.atomic and os.path.exists(target):
+                os.remove(target)
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats["files"] += 1
+            self.stats["bytes"] += len(data)
+            self.stats["write_seconds"] += elapsed
+            if self.fsync == "batch":
+                self._unsynced.append(path)
+
+
+def _fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(directory):
+    """目录 fsync 使 rename 持久化（Windows 不支持，忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
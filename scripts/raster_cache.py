@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+持久化栅格缓存
+缓存编码后的图标字节，跨运行、跨机器复用（可指向 CI 共享缓存卷）
+
+键由以下部分组成：
+    解码后像素的哈希、目标尺寸 / 变体、缩放滤镜、编码参数、工具版本
+因此只修改 app_name / theme_color 等配置时，所有栅格都能命中缓存，
+只需重新生成 manifest 与 HTML 片段。
+
+缓存目录按总大小做 LRU 淘汰：命中时刷新文件 mtime，超出上限时删除最久未用的条目。
+淘汰需要遍历整个缓存目录，构建结束时只在本次写入过新条目时进行（prune_if_written）。
+
+除单个输出外，还可以按源图像素指纹缓存一整套输出（输出集合）：
+只是 PNG 元数据、压缩级别或颜色类型不同的重复上传直接还原，无需逐个查找。
+sources.idx 记录最近见过的源图及其感知哈希（最多 MAX_SOURCE_RECORDS 条），
+用于提示可能的近似重复；每次构建只读一个文件。
+
+用法:
+    python scripts/raster_cache.py stats
+    python scripts/raster_cache.py prune [--max-bytes N]
+    python scripts/raster_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+# 缓存格式版本；键的组成、条目布局或编码前的图像处理变化时递增
+CACHE_FORMAT = 3
+
+DEFAULT_OPTIONS = {
+    "enabled": True,
+    "dir": ".cache/icons",
+    "max_bytes": 512 * 1024 * 1024,
+}
+
+# 覆盖缓存目录的环境变量（例如 CI 共享缓存卷）
+CACHE_DIR_ENV = "TUBIAO_CACHE_DIR"
+
+# pixel_fingerprint 每次读取的像素行数
+FINGERPRINT_ROWS = 256
+
+# sources.idx 保留的源图记录数上限，超出时淘汰最久未见的记录
+MAX_SOURCE_RECORDS = 4096
+
+DEDUPE_OPTIONS = {
+    "reuse_output_sets": True,
+    # 感知哈希（64 位 dHash）汉明距离不超过该值时提示近似重复；0 表示关闭
+    "near_duplicate_distance": 6,
+}
+
+
+def pixel_fingerprint(img):
+    """
+    解码后像素的指纹
+    只取决于模式、尺寸和像素数据，与 PNG 元数据、压缩级别、颜色类型打包无关
+    """
+    h = hashlib.sha256()
+    width, height = img.size
+    h.update(f"{img.mode}:{width}x{height}:".encode())
+    # 按行分块取字节，避免为大图复制整块像素缓冲区；结果与整体 tobytes() 相同
+    for top in range(0, height, FINGERPRINT_ROWS):
+        h.update(img.crop((0, top, width, min(top + FINGERPRINT_ROWS, height))).tobytes())
+    return h.hexdigest()
+
+
+def perceptual_hash(img, hash_size=8):
+    """
+    64 位 dHash：先按整数倍缩到约 64 像素，铺在中灰背景上转灰度，
+    再缩到 (hash_size+1)×hash_size 后比较相邻像素
+    对重新编码、轻微调色和缩放不敏感，用于发现“几乎相同”的源图
+    """
+    from PIL import Image
+
+    if img.mode not in ("RGBA", "RGB", "L", "LA"):
+        img = img.convert("RGBA")
+    # 先缩小再合成，避免在全分辨率上分配背景与灰度图
+    img = img.reduce((max(1, img.width // 64), max(1, img.height // 64))).convert("RGBA")
+    background = Image.new("RGBA", img.size, (128, 128, 128, 255))
+    gray = Image.alpha_composite(background, img).convert("L")
+    small = gray.resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def tool_version():
+    """影响编码结果的工具版本"""
+    import PIL
+    return f"tubiao-cache{CACHE_FORMAT}/Pillow-{PIL.__version__}"
+
+
+def resolve_options(project_root, config):
+    """合并默认值、config.json 的 cache 段与环境变量"""
+    options = dict(DEFAULT_OPTIONS)
+    options.update(config.get("cache", {}))
+    if os.environ.get(CACHE_DIR_ENV):
+        options["dir"] = os.environ[CACHE_DIR_ENV]
+    options["dir"] = os.path.join(project_root, os.path.expanduser(options["dir"]))
+    return options
+
+
+class RasterCache:
+    """按内容寻址的编码结果缓存"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_OPTIONS["max_bytes"]):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, project_root, config):
+        """按配置创建；缓存被禁用时返回 None"""
+        options = resolve_options(project_root, config)
+        if not options["enabled"]:
+            return None
+        return cls(options["dir"], options["max_bytes"])
+
+    @staticmethod
+    def key(*parts):
+        """由任意可 JSON 序列化的部分生成缓存键"""
+        blob = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".bin")
+
+    def get(self, key):
+        """读取条目，命中时刷新 mtime 作为 LRU 时间戳"""
+        data = self._load(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # 只读卷或其他用户写入的条目无法刷新 mtime，仍算命中
+            pass
+        return data
+
+    def put(self, key, data):
+        """原子写入条目（多个进程 / 机器并发写同一键也安全）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            with self._lock:
+                self.written += 1
+        except OSError:
+            # 缓存写入失败不影响构建
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # -------------------------------------------------------- 输出集合
+
+    def put_set(self, key, files):
+        """
+        保存一整套输出 {相对路径: 字节}
+        文件内容按 sha256 寻址存为普通条目，集合本身是指向它们的清单条目
+        """
+        manifest = {}
+        for rel, data in sorted(files.items()):
+            blob = hashlib.sha256(data).hexdigest()
+            if self._load(blob) is None:
+                self.put(blob, data)
+            manifest[rel] = blob
+        self.put(key, json.dumps({"format": CACHE_FORMAT, "files": manifest},
+                                 separators=(",", ":")).encode())
+
+    def get_set(self, key):
+        """还原一整套输出；清单或任一文件已被淘汰时返回 None"""
+        raw = self._load(key)
+        if raw is None:
+            return None
+        try:
+            manifest = json.loads(raw)["files"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        files = {}
+        for rel, blob in manifest.items():
+            data = self._load(blob)
+            if data is None:
+                return None
+            files[rel] = data
+        return files
+
+    # -------------------------------------------------------- 源图记录
+
+    def _sources_path(self):
+        return os.path.join(self.directory, "sources.idx")
+
+    def record_source(self, fingerprint, phash, label):
+        """
+        记录一张见过的源图（同一指纹只保留最近一次），并淘汰超出上限的旧记录
+        并发构建同时改写时后写入者生效，最多丢失一条记录，只影响近似重复提示
+        """
+        records = {r["fingerprint"]: r for r in self.sources()}
+        records[fingerprint] = {"fingerprint": fingerprint, "phash": phash,
+                                "label": label.replace("\n", " "), "time": int(time.time())}
+        kept = sorted(records.values(), key=lambda r: r["time"])[-MAX_SOURCE_RECORDS:]
+        lines = "".join(f"{r['fingerprint']} {r['phash']:016x} {r['time']} {r['label']}\n"
+                        for r in kept)
+        path = self._sources_path()
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(lines)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        # 旧版每张源图一个 JSON 文件，不受大小上限约束
+        legacy = os.path.join(self.directory, "sources")
+        if os.path.isdir(legacy):
+            import shutil
+            shutil.rmtree(legacy, ignore_errors=True)
+
+    def sources(self):
+        """已记录的源图，按记录时间从旧到新"""
+        records = []
+        try:
+            with open(self._sources_path(), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return records
+        for line in lines:
+            parts = line.split(" ", 3)
+            if len(parts) != 4:
+                continue
+            try:
+                records.append({"fingerprint": parts[0], "phash": int(parts[1], 16),
+                                "time": int(parts[2]), "label": parts[3]})
+            except ValueError:
+                continue
+        return records
+
+    def similar_sources(self, fingerprint, phash, max_distance):
+        """像素不同但感知哈希接近的已知源图，按距离排序：[(distance, record)]"""
+        matches = []
+        for record in self.sources():
+            if record["fingerprint"] == fingerprint:
+                continue
+            distance = hamming_distance(phash, record["phash"])
+            if distance <= max_distance:
+                matches.append((distance, record))
+        matches.sort(key=lambda m: (m[0], m[1]["label"]))
+        return matches
+
+    def entries(self):
+        """[(path, size, mtime), ...]"""
+        result = []
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".bin"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                result.append((path, st.st_size, st.st_mtime))
+        return result
+
+    def prune(self, max_bytes=None):
+        """按 LRU 淘汰至总大小不超过上限，返回 (删除条目数, 释放字节数)"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(e[1] for e in entries)
+        removed = freed = 0
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def prune_if_written(self):
+        """本次写入过新条目时才淘汰（缓存只会因写入而变大），返回值同 prune"""
+        with self._lock:
+            written, self.written = self.written, 0
+        if not written:
+            return 0, 0
+        return self.prune()
+
+    def clear(self):
+        import shutil
+
+        shutil.rmtree(os.path.join(self.directory, "sources"), ignore_errors=True)
+        try:
+            os.remove(self._sources_path())
+        except OSError:
+            pass
+        return self.prune(0)
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "dir": self.directory,
+            "entries": len(entries),
+            "bytes": sum(e[1] for e in entries),
+            "max_bytes": self.max_bytes,
+            "sources": len(self.sources()),
+            "oldest": min((e[2] for e in entries), default=None),
+            "newest": max((e[2] for e in entries), default=None),
+        }
+
+    def report(self):
+        """构建报告中的命中摘要"""
+        total = self.hits + self.misses
+        return f"💾 栅格缓存命中 {self.hits}/{total}（{self.directory}）"
+
+
+def _format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def main():
+    import argparse
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="管理持久化栅格缓存")
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--dir", help=f"缓存目录（默认读取 config.json 或 {CACHE_DIR_ENV}）")
+    parser.add_argument("--max-bytes", type=int, help="prune 的大小上限（默认读取配置）")
+    args = parser.parse_args()
+
+    config_path = os.path.join(project_root, "config.json")
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    options = resolve_options(project_root, config)
+    cache = RasterCache(args.dir or options["dir"], options["max_bytes"])
+
+    if args.command == "stats":
+        s = cache.stats()
+        print("💾 栅格缓存")
+        print(f"  📁 目录: {s['dir']}")
+        print(f"  📦 条目: {s['entries']}")
+        print(f"  📊 大小: {_format_bytes(s['bytes'])} / {_format_bytes(s['max_bytes'])}")
+        print(f"  🖼️  已记录源图: {s['sources']}")
+        if s["entries"]:
+            fmt = "%Y-%m-%d %H:%M:%S"
+            print(f"  🕰️  最早使用: {time.strftime(fmt, time.localtime(s['oldest']))}")
+            print(f"  🕐 最近使用: {time.strftime(fmt, time.localtime(s['newest']))}")
+    elif args.command == "prune":
+        removed, freed = cache.prune(args.max_bytes)
+        print(f"🧹 已淘汰 {removed} 个条目，释放 {_format_bytes(freed)}")
+    else:
+        removed, freed = cache.clear()
+        print(f"🗑️  已清空 {removed} 个条目，释放 {_format_bytes(freed)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+可复现构建
+相同输入应得到逐字节相同的输出，制品库、CDN 与基于内容哈希的缓存才不会每次都重新上传。
+
+- 源图的元数据（ICC、EXIF、文本块等）在加载时丢弃，输出只由像素和编码参数决定
+- 设置 SOURCE_DATE_EPOCH 时，输出文件的 mtime 固定为该时间
+- 归档中的条目按路径排序，mtime / 属主 / 权限固定，gzip 头不含时间戳
+
+用法:
+    python scripts/reproducible.py verify [--post-encode] [--keep] [--dist dist]
+    python scripts/reproducible.py hashes [--dist DIR] [-o dist-hashes.json]
+    python scripts/reproducible.py archive icons.tar.gz [--dist DIR]
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+
+# zip 格式能表示的最早时间
+ZIP_EPOCH = 315532800  # 1980-01-01T00:00:00Z
+
+
+def source_date_epoch():
+    """SOURCE_DATE_EPOCH 环境变量（reproducible-builds.org 约定），未设置时返回 None"""
+    value = os.environ.get("SOURCE_DATE_EPOCH")
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"SOURCE_DATE_EPOCH 必须是整数秒: {value}")
+
+
+def strip_metadata(img):
+    """
+    丢弃图像携带的元数据（原地修改并返回）
+    缩放 / 复制会沿用 info，PNG 与 ICO 写入时会带出 ICC 配置等数据块
+    """
+    img.info.clear()
+    return img
+
+
+def hash_tree(root):
+    """{相对路径（/ 分隔）: sha256}，按路径排序"""
+    hashes = {}
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(dirpath, name)
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            hashes[os.path.relpath(path, root).replace(os.sep, "/")] = h.hexdigest()
+    return dict(sorted(hashes.items()))
+
+
+def diff_hashes(first, second):
+    """返回 (仅在第一次出现, 仅在第二次出现, 内容不同) 三个有序列表"""
+    only_first = sorted(set(first) - set(second))
+    only_second = sorted(set(second) - set(first))
+    changed = sorted(k for k in set(first) & set(second) if first[k] != second[k])
+    return only_first, only_second, changed
+
+
+def write_archive(root, path, mtime=None):
+    """
+    将目录打包为 .tar.gz / .tgz / .zip，相同内容得到相同的归档字节
+    mtime 默认取 SOURCE_DATE_EPOCH，未设置时为 0（zip 为 1980-01-01）
+    """
+    if mtime is None:
+        mtime = source_date_epoch() or 0
+    names = sorted(hash_tree(root))
+
+    if path.endswith(".zip"):
+        import time
+        import zipfile
+
+        date_time = time.gmtime(max(mtime, ZIP_EPOCH))[:6]
+        with zipfile.ZipFile(path, "w") as zf:
+            for name in names:
+                info = zipfile.ZipInfo(name, date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.create_system = 3
+                info.external_attr = 0o644 << 16
+                with open(os.path.join(root, name), "rb") as f:
+                    zf.writestr(info, f.read(), compresslevel=9)
+    elif path.endswith((".tar.gz", ".tgz")):
+        import gzip
+        import tarfile
+
+        with open(path, "wb") as raw, \
+                gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as gz, \
+                tarfile.open(fileobj=gz, mode="w", format=tarfile.GNU_FORMAT) as tar:
+            for name in names:
+                full = os.path.join(root, name)
+                info = tarfile.TarInfo(name)
+                info.size = os.path.getsize(full)
+                info.mtime = mtime
+                info.mode = 0o644
+                info.uid = info.gid = 0
+                info.uname = info.gname = ""
+                with open(full, "rb") as f:
+                    tar.addfile(info, f)
+    else:
+        raise ValueError(f"不支持的归档格式（.tar.gz / .tgz / .zip）: {path}")
+
+
+def _build(project_root, out_dir, post_encode, use_cache):
+    """在独立进程中完整构建一次；use_cache 为 False 时不读写栅格缓存"""
+    import subprocess
+
+    scripts = os.path.join(project_root, "scripts")
+    command = [sys.executable, os.path.join(scripts, "generate_icons.py"), "--out", out_dir]
+    if not use_cache:
+        command.append("--no-cache")
+    commands = [command]
+    if post_encode:
+        commands.append([sys.executable, os.path.join(scripts, "compress_assets.py"),
+                         "--dist", out_dir])
+    for command in commands:
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=project_root)
+
+
+def _compare(first, second, first_label, second_label):
+    """打印两组哈希的差异，完全一致时返回 True"""
+    only_first, only_second, changed = diff_hashes(first, second)
+    for name in only_first:
+        print(f"  ➖ {name}（仅 {first_label}）")
+    for name in only_second:
+        print(f"  ➕ {name}（仅 {second_label}）")
+    for name in changed:
+        print(f"  ❌ {name}")
+    if only_first or only_second or changed:
+        print(f"❌ {first_label} 与 {second_label} 不一致：{len(changed)} 个文件内容不同，"
+              f"{len(only_first) + len(only_second)} 个文件只出现在一方")
+        return False
+    return True
+
+
+def verify(project_root, post_encode=False, keep=False, dist=None):
+    """
+    构建两次并比较每个文件的哈希与归档哈希，完全一致时返回 True
+    第一次不使用栅格缓存，第二次使用项目的缓存（可能整套还原），覆盖 CI 实际发布的路径；
+    指定 dist 时还要求该目录与不使用缓存的构建一致
+    """
+    import tempfile
+
+    work = tempfile.mkdtemp(prefix="tubiao-verify-")
+    try:
+        results = []
+        for run, use_cache, label in (("a", False, "不使用缓存"), ("b", True, "使用栅格缓存")):
+            out_dir = os.path.join(work, run)
+            print(f"🔨 第 {len(results) + 1} 次构建（{label}）→ {out_dir}")
+            _build(project_root, out_dir, post_encode, use_cache)
+            archive = os.path.join(work, f"{run}.tar.gz")
+            write_archive(out_dir, archive)
+            with open(archive, "rb") as f:
+                archive_hash = hashlib.sha256(f.read()).hexdigest()
+            results.append((hash_tree(out_dir), archive_hash))
+
+        (first, first_archive), (second, second_archive) = results
+        ok = _compare(first, second, "第 1 次构建", "第 2 次构建")
+        if ok and first_archive != second_archive:
+            print("❌ 文件一致但归档哈希不同")
+            ok = False
+        if ok:
+            print(f"✅ 两次构建逐字节一致（{len(first)} 个文件，归档 {first_archive[:12]}）")
+
+        if dist is not None:
+            if _compare(hash_tree(dist), first, dist, "不使用缓存的构建"):
+                print(f"✅ {dist} 与不使用缓存的构建逐字节一致")
+            else:
+                ok = False
+        return ok
+    finally:
+        if keep:
+            print(f"📁 保留构建目录: {work}")
+        else:
+            import shutil
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    import argparse
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    default_dist = os.path.join(project_root, "dist")
+    parser = argparse.ArgumentParser(description="可复现构建校验与确定性归档")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("verify", help="构建两次（不使用 / 使用栅格缓存）并比较哈希")
+    p.add_argument("--post-encode", action="store_true", help="同时运行 compress_assets.py")
+    p.add_argument("--keep", action="store_true", help="保留两次构建的输出目录")
+    p.add_argument("--dist", help="同时比较该目录（例如刚生成的 dist/）与不使用缓存的构建")
+
+    p = sub.add_parser("hashes", help="输出 dist 中每个文件的 sha256")
+    p.add_argument("--dist", default=default_dist)
+    p.add_argument("-o", "--output", help="写入 JSON 文件（默认打印到标准输出）")
+
+    p = sub.add_parser("archive", help="打包为确定性的 .tar.gz / .zip")
+    p.add_argument("path")
+    p.add_argument("--dist", default=default_dist)
+
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        return 0 if verify(project_root, args.post_encode, args.keep, args.dist) else 1
+    if args.command == "hashes":
+        text = json.dumps(hash_tree(args.dist), indent=2, ensure_ascii=False) + "\n"
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"📄 {args.output}")
+        else:
+            sys.stdout.write(text)
+        return 0
+    write_archive(args.dist, args.path)
+    print(f"📦 {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+批量多尺寸缩放（NumPy）
+一次性将源图转换为预乘 alpha 的 float32 数组，所有目标尺寸共用；
+每个尺寸的水平 / 垂直 Lanczos 权重按输出分块预先计算为小矩阵，
+缩放即两次分块矩阵乘法，不再为每个尺寸重新解包整张源图。
+
+与 Pillow 一致的部分：
+    Lanczos (a=3) 核、采样中心与支撑区间、每个输出像素的权重归一化、
+    在预乘 alpha（RGBa）空间滤波、两次滤波之间截断到 [0, 255]
+不同的部分：
+    中间结果保留浮点而不取整，因此与 Image.resize(..., LANCZOS) 相比
+    预乘 RGBA 每通道误差不超过 TOLERANCE
+    当前输出走 thumbnail 路径（先按整数倍 reduce() 再 LANCZOS），写入的是普通 RGBA；
+    与之相比的误差界见 OUTPUT_TOLERANCE。普通 RGBA 的颜色由预乘值除以 alpha 得到，
+    alpha 很小的像素颜色误差会被放大（alpha=1 时可达 255），但这些像素几乎不可见，
+    合成到任意背景上的误差不超过预乘误差与 alpha 误差之和
+
+用法:
+    python scripts/resample.py [源图] [--sizes 16,32,...] [--repeat 3] [--json out.json]
+    输出与当前逐尺寸调用 Pillow 的对比基准及误差
+"""
+
+import math
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+
+# 滤镜标识；权重或取整方式变化时需要修改。缓存键使用 filter_id()
+FILTER_ID = "lanczos3-numpy1"
+
+# 与 Pillow LANCZOS 相比，预乘 RGBA 每通道允许的最大误差（0-255）
+# Pillow 的权重是定点数，中间结果取整为 8 位，两次滤波的取整差异叠加后可达 2
+TOLERANCE = 2
+
+# 写入的普通 RGBA 与当前 thumbnail 路径相比允许的最大误差（0-255）
+#   alpha          alpha 通道
+#   premultiplied  预乘后的 RGB（即合成到黑色背景上的颜色）
+#   opaque_color   alpha ≥ OPAQUE_ALPHA 的像素的 RGB
+OUTPUT_TOLERANCE = {"alpha": 2, "premultiplied": 4, "opaque_color": 6}
+OPAQUE_ALPHA = 128
+
+LANCZOS_SUPPORT = 3.0
+
+
+@lru_cache(maxsize=None)
+def filter_id():
+    """
+    缓存键中的滤镜标识
+    float32 matmul 的结果随 numpy 版本、BLAS 实现和 CPU 指令集（BLAS / numpy 运行时分派）变化，
+    共享缓存的不同构建机不能互相复用缩放结果，因此一并计入
+    """
+    import platform
+
+    try:
+        config = np.show_config(mode="dicts")
+    except TypeError:
+        # numpy < 1.26 没有 mode 参数
+        config = {}
+    blas = config.get("Build Dependencies", {}).get("blas", {})
+    simd = config.get("SIMD Extensions", {}).get("found", [])
+    return "/".join([
+        FILTER_ID,
+        f"numpy-{np.__version__}",
+        f"{blas.get('name', 'blas')}-{blas.get('version', 'unknown')}",
+        platform.machine(),
+        "+".join(simd) or platform.processor() or "cpu",
+    ])
+
+
+def _lanczos(x):
+    x = np.abs(x)
+    return np.where(x < LANCZOS_SUPPORT, np.sinc(x) * np.sinc(x / LANCZOS_SUPPORT), 0.0)
+
+
+@lru_cache(maxsize=None)
+def lanczos_plan(n_in, n_out):
+    """
+    一维缩放的分块权重：[(o0, o1, lo, hi, W)]
+    输出 [o0, o1) 只依赖输入 [lo, hi)，W 形如 (hi - lo, o1 - o0)
+    分块大小随缩放比例变化，使每块的输入窗口保持在百余像素以内
+    """
+    scale = n_in / n_out
+    filterscale = max(scale, 1.0)
+    support = LANCZOS_SUPPORT * filterscale
+    centers = (np.arange(n_out) + 0.5) * scale
+    # 与 Pillow precompute_coeffs 相同的支撑区间（C 语言向零取整）
+    xmin = np.maximum((centers - support + 0.5).astype(np.int64), 0)
+    xmax = np.minimum((centers + support + 0.5).astype(np.int64), n_in)
+
+    block = max(4, min(128, int(64 / scale)))
+    blocks = []
+    for o0 in range(0, n_out, block):
+        o1 = min(o0 + block, n_out)
+        lo, hi = int(xmin[o0:o1].min()), int(xmax[o0:o1].max())
+        xs = np.arange(lo, hi)
+        w = _lanczos((xs[None, :] - centers[o0:o1, None] + 0.5) / filterscale)
+        w *= (xs[None, :] >= xmin[o0:o1, None]) & (xs[None, :] < xmax[o0:o1, None])
+        w /= w.sum(axis=1, keepdims=True)
+        blocks.append((o0, o1, lo, hi, np.ascontiguousarray(w.T, dtype=np.float32)))
+    return tuple(blocks)
+
+
+def _resample_last_axis(data, n_out):
+    """沿最后一维缩放到 n_out"""
+    out = np.empty(data.shape[:-1] + (n_out,), dtype=np.float32)
+    for o0, o1, lo, hi, w in lanczos_plan(data.shape[-1], n_out):
+        np.matmul(data[..., lo:hi], w, out=out[..., o0:o1])
+    return out
+
+
+class BatchResampler:
+    """
+    共享同一份预乘 float 源图的多尺寸缩放器（只支持正方形源图缩小到正方形）
+
+    用法:
+        resampler = BatchResampler(source_img)
+        images = resampler.resize_many([16, 32, 48])   # {size: RGBA Image}
+    """
+
+    def __init__(self, source_img):
+        if source_img.width != source_img.height:
+            raise ValueError(f"批量缩放只支持正方形源图: {source_img.size}")
+        self.size = source_img.width
+        self._source = source_img
+        rgba = np.asarray(source_img.convert("RGBA"), dtype=np.float32)
+        rgba[..., :3] *= rgba[..., 3:4] / 255.0
+        # (通道, 行, 列)，水平滤波沿最后一维进行
+        self._planes = np.ascontiguousarray(rgba.transpose(2, 0, 1))
+
+    def resize_premultiplied(self, size):
+        """返回 (size, size, 4) 的 uint8 预乘 RGBA 数组"""
+        horizontal = _resample_last_axis(self._planes, size)
+        np.clip(horizontal, 0, 255, out=horizontal)
+        # 转为 (通道, 列, 行) 后沿行方向滤波
+        vertical = _resample_last_axis(np.ascontiguousarray(horizontal.transpose(0, 2, 1)), size)
+        result = vertical.transpose(2, 1, 0)
+        return np.clip(result + 0.5, 0, 255).astype(np.uint8)
+
+    def resize(self, size):
+        from PIL import Image
+
+        if size == self.size:
+            # 与 thumbnail 一致：目标尺寸等于源图时不重新采样
+            return self._source.copy()
+        data = self.resize_premultiplied(size)
+        return Image.frombytes("RGBa", (size, size), data.tobytes()).convert("RGBA")
+
+    def resize_many(self, sizes):
+        return {size: self.resize(size) for size in sorted(set(sizes))}
+
+
+# ============================================================
+# 基准与误差
+# ============================================================
+
+def _error(a, b):
+    diff = np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16))
+    return int(diff.max()), float(diff.mean())
+
+
+def output_error(ours, reference):
+    """
+    两张普通 RGBA 图像按 OUTPUT_TOLERANCE 各项计算的最大误差
+    返回 {"alpha", "premultiplied", "opaque_color", "color"}，color 为不分 alpha 的 RGB 误差，仅供参考
+    """
+    a = np.asarray(ours, dtype=np.int16)
+    b = np.asarray(reference, dtype=np.int16)
+    diff = np.abs(a - b)
+    opaque = np.minimum(a[..., 3], b[..., 3]) >= OPAQUE_ALPHA
+    premultiplied, _ = _error(ours.convert("RGBa"), reference.convert("RGBa"))
+    return {
+        "alpha": int(diff[..., 3].max()),
+        "premultiplied": premultiplied,
+        "opaque_color": int(diff[..., :3][opaque].max(initial=0)),
+        "color": int(diff[..., :3].max()),
+    }
+
+
+def within_output_tolerance(errors):
+    return all(errors[k] <= limit for k, limit in OUTPUT_TOLERANCE.items())
+
+
+def benchmark(source_img, sizes, repeat=3):
+    """
+    对比当前逐尺寸 thumbnail 路径与批量路径
+    返回 {"pillow_seconds", "numpy_seconds", "speedup", "sizes": [...]}
+    """
+    import time
+
+    from PIL import Image
+
+    def pillow_path():
+        results = {}
+        for size in sizes:
+            img = source_img.copy()
+            img.thumbnail((size, size), Image.LANCZOS)
+            results[size] = img
+        return results
+
+    def numpy_path():
+        # 每轮重新构造，计入源图转换的开销
+        return BatchResampler(source_img).resize_many(sizes)
+
+    def best_of(fn):
+        best, result = math.inf, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    pillow_seconds, thumbnails = best_of(pillow_path)
+    numpy_seconds, batched = best_of(numpy_path)
+
+    # TOLERANCE 检查滤波本身：在预乘 RGBA 上与 Image.resize(LANCZOS) 比较；
+    # OUTPUT_TOLERANCE 检查实际写入的普通 RGBA：与当前 thumbnail 路径比较
+    resampler = BatchResampler(source_img)
+    premultiplied = source_img.convert("RGBa")
+    rows = []
+    for size in sorted(set(sizes)):
+        if size == resampler.size:
+            ours = reference = premultiplied
+        else:
+            ours = resampler.resize_premultiplied(size)
+            reference = premultiplied.resize((size, size), Image.LANCZOS)
+        max_err, mean_err = _error(ours, reference)
+        output = output_error(batched[size], thumbnails[size])
+        rows.append({
+            "size": size,
+            "max_error": max_err,
+            "mean_error": round(mean_err, 4),
+            "output_error": output,
+            "within_tolerance": max_err <= TOLERANCE and within_output_tolerance(output),
+        })
+    return {
+        "source": list(source_img.size),
+        "repeat": repeat,
+        "tolerance": TOLERANCE,
+        "output_tolerance": OUTPUT_TOLERANCE,
+        "pillow_seconds": round(pillow_seconds, 4),
+        "numpy_seconds": round(numpy_seconds, 4),
+        "speedup": round(pillow_seconds / numpy_seconds, 2),
+        "sizes": rows,
+    }
+
+
+def main():
+    import argparse
+    import json
+
+    from PIL import Image
+
+    from generate_icons import planned_sizes, plan_targets
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="批量 NumPy 缩放与逐尺寸 Pillow 缩放的基准对比")
+    parser.add_argument("source", nargs="?", default=os.path.join(project_root, "src", "icon.png"))
+    parser.add_argument("--sizes", help="逗号分隔的尺寸（默认为一次完整构建需要的全部尺寸）")
+    parser.add_argument("--repeat", type=int, default=3, help="每条路径重复次数，取最快一次")
+    parser.add_argument("--json", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    source_img = Image.open(args.source).convert("RGBA")
+    if args.sizes:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    else:
+        sizes = planned_sizes(plan_targets({}))
+    sizes = [s for s in sizes if s <= min(source_img.size)]
+
+    result = benchmark(source_img, sizes, args.repeat)
+
+    print(f"📐 源尺寸 {source_img.width}x{source_img.height}，{len(result['sizes'])} 个尺寸")
+    print(f"  🐢 Pillow 逐尺寸 thumbnail: {result['pillow_seconds'] * 1000:.0f} ms")
+    print(f"  🚀 NumPy 批量:             {result['numpy_seconds'] * 1000:.0f} ms "
+          f"(×{result['speedup']})")
+    limits = " / ".join(f"{k} ≤ {v}" for k, v in OUTPUT_TOLERANCE.items())
+    print(f"  📏 与 Pillow LANCZOS 的预乘 RGBA 误差（≤ {TOLERANCE}），"
+          f"与当前 thumbnail 输出的普通 RGBA 误差（{limits}）:")
+    for row in result["sizes"]:
+        mark = "✅" if row["within_tolerance"] else "❌"
+        out = row["output_error"]
+        print(f"    {mark} {row['size']:>5}  最大 {row['max_error']}  平均 {row['mean_error']:.4f}"
+              f"  ·  输出 alpha {out['alpha']}  预乘 {out['premultiplied']}"
+              f"  不透明颜色 {out['opaque_color']}  全部颜色 {out['color']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"📄 {args.json}")
+    return 0 if all(r["within_tolerance"] for r in result["sizes"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
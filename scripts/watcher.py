@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+文件监听
+优先使用 watchdog（Linux 下基于 inotify），不可用时回退为标准库轮询
+
+变更会经过防抖合并：在最后一次变更后安静 debounce 秒才回调一次，
+回调参数为本轮发生变化的绝对路径集合。回调抛出的异常只打印，不会结束监听
+（编辑器保存到一半的文件常常无法解析，下一次保存会再次触发回调）。
+"""
+
+import os
+import threading
+import time
+import traceback
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+
+def _snapshot(paths):
+    """收集被监听路径下所有文件的 (mtime_ns, size)"""
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        elif os.path.isdir(path):
+            files = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            continue
+        for f in files:
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+            if not os.path.isdir(f):
+                state[f] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+class FileWatcher:
+    """
+    监听若干文件 / 目录（不递归）
+
+    用法:
+        watcher = FileWatcher([src_dir, config_path], on_change)
+        watcher.run()   # 阻塞，Ctrl+C 退出
+    """
+
+    def __init__(self, paths, callback, debounce=0.15, poll_interval=0.1):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._pending = set()
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return "watchdog" if Observer is not None else "polling"
+
+    def _record(self, path):
+        with self._lock:
+            self._pending.add(os.path.abspath(path))
+            self._last_event = time.monotonic()
+
+    def _drain(self):
+        """防抖期满后取出待处理的变更"""
+        with self._lock:
+            if not self._pending or time.monotonic() - self._last_event < self.debounce:
+                return None
+            changed, self._pending = self._pending, set()
+        return changed
+
+    def _dispatch(self, changed):
+        try:
+            self.callback(changed)
+        except Exception as e:
+            print(f"\n❌ 本轮重新生成失败，继续监听: {type(e).__name__}: {e}")
+            traceback.print_exc()
+
+    def _watched(self, path):
+        path = os.path.abspath(path)
+        return any(path == p or os.path.dirname(path) == p for p in self.paths)
+
+    def run(self):
+        if Observer is not None:
+            self._run_watchdog()
+        else:
+            self._run_polling()
+
+    def _run_watchdog(self):
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path and watcher._watched(path):
+                        watcher._record(path)
+
+        observer = Observer()
+        dirs = {p if os.path.isdir(p) else os.path.dirname(p) for p in self.paths}
+        for d in sorted(dirs):
+            observer.schedule(Handler(), d, recursive=False)
+        observer.start()
+        try:
+            while True:
+                time.sleep(self.poll_interval / 2)
+                changed = self._drain()
+                if changed:
+                    self._dispatch(changed)
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _run_polling(self):
+        state = _snapshot(self.paths)
+        while True:
+            time.sleep(self.poll_interval)
+            current = _snapshot(self.paths)
+            if current != state:
+                for path in set(state) | set(current):
+                    if state.get(path) != current.get(path):
+                        self._record(path)
+                state = current
+            changed = self._drain()
+            if changed:
+                self._dispatch(changed)
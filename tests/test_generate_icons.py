@@ -0,0 +1,42 @@
+"""generate_icons 回归测试：python -m unittest discover -s tests"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+import generate_icons  # noqa: E402
+
+
+def _source(size=512):
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(img).ellipse((size // 8, size // 8, size * 7 // 8, size * 7 // 8),
+                                fill=(74, 144, 217, 255))
+    return img
+
+
+class SaveIcoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_ico_contains_every_size(self):
+        sizes = generate_icons.ICON_SIZES["windows"]
+        path = os.path.join(self.tmp.name, "icon.ico")
+        count = generate_icons.save_ico(_source(), path, sizes)
+        generate_icons._sink().flush()
+
+        with Image.open(path) as ico:
+            written = sorted(ico.ico.sizes())
+        expected = sorted((s, s) for s in sizes if s <= 256)
+        self.assertEqual(written, expected)
+        self.assertEqual(count, len(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
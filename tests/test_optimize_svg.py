@@ -0,0 +1,59 @@
+"""optimize_svg 回归测试：python -m unittest discover -s tests"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import optimize_svg  # noqa: E402
+from optimize_svg import optimize_svg_file, round_numbers  # noqa: E402
+
+
+class RoundNumbersTest(unittest.TestCase):
+
+    def test_keeps_separator_when_minus_sign_is_rounded_away(self):
+        self.assertEqual(round_numbers("M5-0.001L3-0.002 4 4z", 2), "M5 0L3 0 4 4z")
+        self.assertEqual(round_numbers("1-0.001 2 2", 2), "1 0 2 2")
+
+    def test_keeps_separator_between_implicit_decimals(self):
+        self.assertEqual(round_numbers("M5.004.5L1 1", 2), "M5 0.5L1 1")
+        self.assertEqual(round_numbers("M1.5.5", 2), "M1.5 0.5")
+
+    def test_leaves_negative_numbers_adjacent(self):
+        self.assertEqual(round_numbers("M10-5.004-3", 2), "M10-5-3")
+
+
+class OptimizeFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _run(self, data, options=None):
+        src = os.path.join(self.tmp.name, "in.svg")
+        dest = os.path.join(self.tmp.name, "out.svg")
+        with open(src, "wb") as f:
+            f.write(data)
+        with mock.patch("builtins.print"):
+            optimize_svg_file(src, dest, options)
+        with open(dest, "rb") as f:
+            return f.read()
+
+    def test_malformed_svg_is_copied(self):
+        data = b'<svg xmlns="http://www.w3.org/2000/svg"><path d="M0 0'
+        self.assertEqual(self._run(data), data)
+
+    def test_unverified_output_requires_opt_in(self):
+        data = (b'<svg xmlns="http://www.w3.org/2000/svg">\n  <!-- comment -->\n'
+                b'  <path d="M0.0001 0.0001L10.0001 10.0001"/>\n</svg>\n')
+        with mock.patch.object(optimize_svg, "_load_cairosvg", return_value=False):
+            self.assertEqual(self._run(data), data)
+            optimized = self._run(data, {"allow_unverified": True})
+        self.assertLess(len(optimized), len(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
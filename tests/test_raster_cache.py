@@ -0,0 +1,86 @@
+"""raster_cache 回归测试：python -m unittest discover -s tests"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import raster_cache  # noqa: E402
+from raster_cache import RasterCache  # noqa: E402
+
+
+class RasterCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = RasterCache(self.tmp.name)
+
+    def _put(self, name, data, mtime):
+        key = RasterCache.key(name)
+        self.cache.put(key, data)
+        os.utime(self.cache._path(key), (mtime, mtime))
+        return key
+
+    def test_prune_evicts_least_recently_used(self):
+        old = self._put("old", b"a" * 100, 1000)
+        mid = self._put("mid", b"b" * 100, 2000)
+        new = self._put("new", b"c" * 100, 3000)
+
+        removed, freed = self.cache.prune(max_bytes=200)
+
+        self.assertEqual((removed, freed), (1, 100))
+        self.assertIsNone(self.cache.get(old))
+        self.assertEqual(self.cache.get(mid), b"b" * 100)
+        self.assertEqual(self.cache.get(new), b"c" * 100)
+
+    def test_hit_refreshes_lru_timestamp(self):
+        first = self._put("first", b"a" * 100, 1000)
+        second = self._put("second", b"b" * 100, 2000)
+
+        self.cache.get(first)
+        self.cache.prune(max_bytes=100)
+
+        self.assertEqual(self.cache.get(first), b"a" * 100)
+        self.assertIsNone(self.cache.get(second))
+
+    def test_hit_counts_when_touch_fails(self):
+        key = self._put("entry", b"data", 1000)
+
+        with mock.patch("raster_cache.os.utime", side_effect=PermissionError):
+            self.assertEqual(self.cache.get(key), b"data")
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 0))
+
+    def test_prune_if_written_skips_walk_without_writes(self):
+        self._put("entry", b"data", 1000)
+        self.cache.prune_if_written()
+
+        with mock.patch.object(RasterCache, "entries") as entries:
+            self.assertEqual(self.cache.prune_if_written(), (0, 0))
+        entries.assert_not_called()
+
+    def test_get_set_misses_when_blob_evicted(self):
+        files = {"a.png": b"first", "b.png": b"second"}
+        self.cache.put_set("set", files)
+        self.assertEqual(self.cache.get_set("set"), files)
+
+        os.remove(self.cache._path(hashlib.sha256(b"second").hexdigest()))
+
+        self.assertIsNone(self.cache.get_set("set"))
+
+    def test_source_records_are_capped(self):
+        with mock.patch.object(raster_cache, "MAX_SOURCE_RECORDS", 3):
+            for i in range(5):
+                with mock.patch("raster_cache.time.time", return_value=1000 + i):
+                    self.cache.record_source(f"fp{i}", i, f"source {i}")
+
+        self.assertEqual([r["fingerprint"] for r in self.cache.sources()], ["fp2", "fp3", "fp4"])
+
+
+if __name__ == "__main__":
+    unittest.main()